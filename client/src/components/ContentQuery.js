@@ -5,17 +5,19 @@ import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import {
   faWandMagicSparkles,
   faCheckCircle,
+  faRotateRight,
 } from '@fortawesome/free-solid-svg-icons';
 import {SyncLoader} from 'react-spinners';
 import { generateMockContent } from '../config/demo';
 
-export default function ContentQuery({ content, setContent }) {
+export default function ContentQuery({ content, setContent, setPostId }) {
 
     const [contentQuery, setContentQuery] = useState('');
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState('');
 
-    const handleGenerateContent = async () => {
+    // regenerate skips the server's near-duplicate cache so the user gets a new post
+    const handleGenerateContent = async (regenerate = false) => {
         if (!contentQuery.trim()) {
             setError('Please enter a prompt for content generation');
             return;
@@ -30,16 +32,19 @@ export default function ContentQuery({ content, setContent }) {
             `${process.env.REACT_APP_BACKEND_URL || 'http://localhost:5005'}/api/v1/generate-content`,
             {
               query: contentQuery,
+              regenerate,
             }
           );
           const generatedContent = contentResponse.data.content;
           setContent(generatedContent);
+          setPostId(contentResponse.data.post_id ?? null);
           setLoading(false);
         } catch (error) {
           console.log('Backend not available, using demo mode');
           // Fallback to demo mode
           const demoContent = generateMockContent(contentQuery);
           setContent(demoContent.content);
+          setPostId(null);
           setLoading(false);
         }
     };
@@ -65,7 +70,7 @@ export default function ContentQuery({ content, setContent }) {
                     )}
 
                     <button
-                        onClick={handleGenerateContent}
+                        onClick={() => handleGenerateContent(false)}
                         disabled={loading || !contentQuery.trim()}
                         className={`w-1/3 flex items-center justify-center px-3 py-4 mt-2 text-white rounded-xl font-montserrat text-md ${
                             loading || !contentQuery.trim() 
@@ -90,9 +95,19 @@ export default function ContentQuery({ content, setContent }) {
             
             {content && (
                 <div className="card p-6 mt-6">
-                    <div className="flex items-center mb-3">
-                        <FontAwesomeIcon icon={faCheckCircle} className="text-teal-400 mr-2" />
-                        <h4 className="text-md font-montserrat font-semibold text-black">Content Generated Successfully!</h4>
+                    <div className="flex items-center justify-between mb-3">
+                        <div className="flex items-center">
+                            <FontAwesomeIcon icon={faCheckCircle} className="text-teal-400 mr-2" />
+                            <h4 className="text-md font-montserrat font-semibold text-black">Content Generated Successfully!</h4>
+                        </div>
+                        <button
+                            onClick={() => handleGenerateContent(true)}
+                            disabled={loading || !contentQuery.trim()}
+                            className="px-3 py-2 text-sm text-teal-600 hover:text-teal-700 font-montserrat disabled:text-gray-400"
+                        >
+                            <FontAwesomeIcon icon={faRotateRight} className="mr-2" />
+                            Regenerate
+                        </button>
                     </div>
                     <div className="bg-white border border-gray-200 rounded-xl p-6 text-black">
                         <Markdown className="prose max-w-none text-black">
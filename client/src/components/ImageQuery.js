@@ -8,7 +8,7 @@ import {
 import {SyncLoader} from 'react-spinners';
 import { generateMockImage } from '../config/demo';
 
-export default function ImageQuery({image, setImage}){
+export default function ImageQuery({image, setImage, setImageId, postId}){
     const [imageQuery, setImageQuery] = useState('');
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState('');
@@ -28,18 +28,22 @@ export default function ImageQuery({image, setImage}){
             `${process.env.REACT_APP_BACKEND_URL || 'http://localhost:5005'}/api/v1/generate-image`,
             {
               query: imageQuery,
+              post_id: postId,
             },
             { responseType: 'blob' }
           );
     
           const imageURL = URL.createObjectURL(imageResponse.data);
           setImage(imageURL);
+          // Identifies this exact image when publishing, even after newer generations
+          setImageId(imageResponse.headers['x-image-id'] || null);
           setLoading(false);
         } catch (error) {
           console.log('Backend not available, using demo mode');
           // Fallback to demo mode
           const demoImage = generateMockImage(imageQuery);
           setImage(demoImage.imageUrl);
+          setImageId(null);
           setLoading(false);
         }
       };
@@ -0,0 +1,82 @@
+import React, { useCallback, useEffect, useState } from 'react';
+import axios from 'axios';
+import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
+import { faClockRotateLeft } from '@fortawesome/free-solid-svg-icons';
+import { SyncLoader } from 'react-spinners';
+
+const PAGE_SIZE = 10;
+
+export default function PostHistory({ refreshKey, onSelect }) {
+    const [posts, setPosts] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loading, setLoading] = useState(false);
+    const [available, setAvailable] = useState(true);
+
+    // cursor === null loads the newest page; otherwise the page after it is appended
+    const loadPage = useCallback(async (cursor) => {
+        setLoading(true);
+        try {
+            const response = await axios.get(
+                `${process.env.REACT_APP_BACKEND_URL || 'http://localhost:5005'}/api/v1/posts`,
+                { params: { limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) } }
+            );
+            setPosts((previous) => (cursor ? [...previous, ...response.data.posts] : response.data.posts));
+            setNextCursor(response.data.next_cursor);
+        } catch (error) {
+            // Demo mode: there is no backend to keep history
+            setAvailable(false);
+        } finally {
+            setLoading(false);
+        }
+    }, []);
+
+    useEffect(() => {
+        loadPage(null);
+    }, [loadPage, refreshKey]);
+
+    if (!available) {
+        return null;
+    }
+
+    return (
+        <div className="max-width mt-8 card p-6">
+            <h3 className="text-2xl font-bebas flex items-center">
+                <FontAwesomeIcon icon={faClockRotateLeft} className="mr-2 text-teal-500" />
+                Post History
+            </h3>
+            {posts.length === 0 && !loading && (
+                <p className="mt-3 text-gray-500 font-montserrat">Generated posts will appear here.</p>
+            )}
+            <ul className="mt-3 divide-y divide-gray-200">
+                {posts.map((post) => (
+                    <li key={post.id} className="py-3 flex items-start justify-between gap-4">
+                        <div className="font-montserrat text-sm text-black">
+                            <p className="line-clamp-2">{post.content}</p>
+                            <p className="mt-1 text-xs text-gray-500">
+                                {new Date(post.created_at * 1000).toLocaleString()} · {post.status}
+                                {post.image_id ? ' · with image' : ''}
+                            </p>
+                        </div>
+                        {onSelect && (
+                            <button
+                                onClick={() => onSelect(post)}
+                                className="px-3 py-2 text-sm text-teal-600 hover:text-teal-700 font-montserrat whitespace-nowrap"
+                            >
+                                Reuse
+                            </button>
+                        )}
+                    </li>
+                ))}
+            </ul>
+            {loading && <SyncLoader className="mt-3" size={6} color="#14b8a6" />}
+            {nextCursor && !loading && (
+                <button
+                    onClick={() => loadPage(nextCursor)}
+                    className="mt-3 px-4 py-2 text-teal-600 hover:text-teal-700 font-montserrat"
+                >
+                    Load more
+                </button>
+            )}
+        </div>
+    );
+}
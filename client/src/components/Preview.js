@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import axios from 'axios';
 import Markdown from 'react-markdown';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
@@ -9,10 +9,16 @@ import { faEye, faEyeSlash } from '@fortawesome/free-solid-svg-icons';
 import { SyncLoader } from 'react-spinners';
 import { mockLinkedInPost } from '../config/demo';
 
-export default function Preview({ content, image, selectedDays }) {
+export default function Preview({ content, image, imageId, postId, selectedDays, onPosted }) {
     const [showPreview, setShowPreview] = useState(false);
     const [posting, setPosting] = useState(false);
     const [postStatus, setPostStatus] = useState('');
+    // Same key for the same post, so a retried click can't publish it twice; a new
+    // post (content or image) gets a new key
+    const idempotencyKey = useRef(null);
+    useEffect(() => {
+        idempotencyKey.current = crypto.randomUUID();
+    }, [content, imageId]);
 
     const handlePostToLinkedIn = async () => {
         if (!content || !image) {
@@ -29,12 +35,20 @@ export default function Preview({ content, image, selectedDays }) {
                 `${process.env.REACT_APP_BACKEND_URL || 'http://localhost:5005'}/api/v1/post-linkedin`,
                 {
                     generated_content: content,
-                    image_path: 'generated_image.png' // This would be the actual image path
-                }
+                    image_id: imageId,
+                    post_id: postId,
+                    image_path: 'generated_image.png' // Older servers without image ids
+                },
+                { headers: { 'Idempotency-Key': idempotencyKey.current } }
             );
 
             if (response.data.success) {
-                setPostStatus('Successfully posted to LinkedIn! 🎉');
+                setPostStatus(response.data.duplicate
+                    ? 'Success: this post was already sent to LinkedIn 🎉'
+                    : 'Successfully queued for LinkedIn, publishing in the background! 🎉');
+                if (onPosted) {
+                    onPosted();
+                }
             } else {
                 setPostStatus(`Failed to post to LinkedIn: ${response.data.error || 'Unknown error'}`);
             }
@@ -8,21 +8,46 @@ import toast, { Toaster } from 'react-hot-toast'
 import { useState } from "react";
 
 
+const CAMPAIGN_POLL_INTERVAL = 3000;
+// Give up waiting after this long; the server keeps (or resumes) generating on its own
+const CAMPAIGN_POLL_TIMEOUT = 20 * 60 * 1000;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export default function Schedule({ content, selectedDays, setSelectedDays }) {
   const [, setStatus] = useState('');
+  const [topic, setTopic] = useState('');
 
-  const handlePostToLinkedIn = async () => {
+  // The server writes one distinct post (and image) per day up front, so each
+  // scheduled publish below is only an upload
+  const prepareCampaign = async () => {
+    const created = await axios.post(
+      `${process.env.REACT_APP_BACKEND_URL}/api/v1/campaigns`,
+      { topic: topic.trim() || content, count: selectedDays, images: true }
+    );
+    let campaign = created.data;
+    const deadline = Date.now() + CAMPAIGN_POLL_TIMEOUT;
+    while (campaign.status === 'generating') {
+      if (Date.now() >= deadline) {
+        throw new Error(`campaign ${campaign.id} is still generating after ${CAMPAIGN_POLL_TIMEOUT / 60000} minutes`);
+      }
+      await sleep(CAMPAIGN_POLL_INTERVAL);
+      const response = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/v1/campaigns/${campaign.id}`);
+      campaign = response.data;
+    }
+    if (campaign.status !== 'ready') {
+      throw new Error(campaign.error || 'campaign generation failed');
+    }
+    return campaign;
+  };
+
+  const handlePostToLinkedIn = async (campaignId, position) => {
     try {
       const postResponse = await axios.post(
-        `${process.env.REACT_APP_BACKEND_URL}/api/v1/post-linkedin`,
-        {
-          generated_content: content,
-          image_path: 'generated_image.png',
-        }
+        `${process.env.REACT_APP_BACKEND_URL}/api/v1/campaigns/${campaignId}/posts/${position}/publish`
       );
 
       setStatus(postResponse.data.status);
-      toast.success("Content successfully uploaded to LinkedIn.", { duration: 5000 })
+      toast.success(`Post ${position} queued for LinkedIn.`, { duration: 5000 })
     } catch (error) {
       console.error('Error posting to LinkedIn:', error);
       toast.error(`Error posting to LinkedIn due to ${error}`, { duration: 5000 })
@@ -30,12 +55,31 @@ export default function Schedule({ content, selectedDays, setSelectedDays }) {
   };
 
   const handleAutomatedPosts = async () => {
-    for (let day = 0; day < selectedDays; day++){
+    if (selectedDays < 1 || !(topic.trim() || content)) {
+      toast.error("Enter a topic for the campaign.", { duration: 5000 })
+      return;
+    }
+
+    let campaign;
+    try {
+      setStatus("Preparing posts");
+      toast.loading(`Preparing ${selectedDays} posts...`, { id: 'campaign' })
+      campaign = await prepareCampaign();
+      toast.success(`${campaign.posts.length} posts ready.`, { id: 'campaign', duration: 5000 })
+    } catch (error) {
+      console.error('Error preparing campaign:', error);
+      toast.error(`Error preparing posts due to ${error}`, { id: 'campaign', duration: 5000 })
+      return;
+    }
+
+    // Fewer posts than days when the model's drafts were too similar to keep
+    const days = campaign.posts.length;
+    for (let day = 0; day < days; day++){
       setStatus(`Posting for day ${day + 1}`);
-      await handlePostToLinkedIn();
-      
-      if (day < selectedDays - 1) {
-        await new Promise((resolve) => setTimeout(resolve, 86400000));
+      await handlePostToLinkedIn(campaign.id, campaign.posts[day].position);
+
+      if (day < days - 1) {
+        await sleep(86400000);
       }
     }
     setStatus("All posts completed.")
@@ -51,6 +95,14 @@ export default function Schedule({ content, selectedDays, setSelectedDays }) {
         
       </div>
 
+        <input
+          type="text"
+          value={topic}
+          onChange={(e) => setTopic(e.target.value)}
+          placeholder="Campaign topic (defaults to the current post)"
+          className="w-full p-4 mt-2 bg-zinc-100 border-2 border-gray-300 rounded-xl resize-none font-montserrat text-black"
+        />
+
         <div className="flex flex-row items-center mt-3 gap-3">
         <input
           type="number"
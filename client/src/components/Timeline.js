@@ -3,27 +3,49 @@ import ContentQuery from "./ContentQuery";
 import ImageQuery from "./ImageQuery";
 import Schedule from "./Schedule";
 import Preview from "./Preview";
+import PostHistory from "./PostHistory";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:5005';
 
 export default function Timeline() {
     const [days, setDays] = useState(1);
     const [content, setContent] = useState('');
     const [image, setImage] = useState(null);
+    const [imageId, setImageId] = useState(null);
+    // Server-side history row of the current post, so image and publish results attach to it
+    const [postId, setPostId] = useState(null);
+    const [historyVersion, setHistoryVersion] = useState(0);
+
+    const reusePost = (post) => {
+        setContent(post.content);
+        setPostId(post.id);
+        setImageId(post.image_id);
+        setImage(post.image_id ? `${BACKEND_URL}/api/v1/images/${post.image_id}` : null);
+    };
 
-    
     return (
         <>
            
             <Schedule content={content} selectedDays={days} setSelectedDays={setDays} />
             <div className="max-width grid grid-cols-2 gap-8 mt-10">
                 <div className="bg-zinc-100 border border-slate-300 rounded-xl p-4 shadow-sm">
-                    <ContentQuery content={content} setContent={setContent} />
+                    <ContentQuery content={content} setContent={setContent} setPostId={setPostId} />
                 </div>
                 <div className="bg-zinc-100 border border-slate-300 rounded-xl p-4 shadow-sm">
-                    <ImageQuery image={image} setImage={setImage} />
+                    <ImageQuery image={image} setImage={setImage} setImageId={setImageId} postId={postId} />
                 </div>
             </div>
 
-            <Preview content={content} image={image} selectedDays={days} />
+            <Preview
+                content={content}
+                image={image}
+                imageId={imageId}
+                postId={postId}
+                selectedDays={days}
+                onPosted={() => setHistoryVersion((version) => version + 1)}
+            />
+
+            <PostHistory refreshKey={`${postId}-${historyVersion}`} onSelect={reusePost} />
         </>
     );
 }
@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import Navbar from "../components/Navbar";
 import axios from "axios";
 import Markdown from "react-markdown";
@@ -6,6 +6,17 @@ import Markdown from "react-markdown";
 export default function PostAnalysis() {
   const [postUrl, setPostUrl] = useState("");
   const [analysis, setAnalyis] = useState("");
+  const [publishedPosts, setPublishedPosts] = useState([]);
+
+  // Recently published posts from the server's history, to pick a URN without looking it up
+  useEffect(() => {
+    axios
+      .get(`${process.env.REACT_APP_BACKEND_URL}/api/v1/posts`, {
+        params: { status: "published", limit: 10 },
+      })
+      .then((response) => setPublishedPosts(response.data.posts))
+      .catch(() => setPublishedPosts([]));
+  }, []);
 
   const handleSummary = async () => {
     try {
@@ -56,6 +67,25 @@ export default function PostAnalysis() {
             Get Post Analysis
           </button>
         </div>
+        {publishedPosts.length > 0 && (
+          <div className='mt-4'>
+            <p className='text-sm font-montserrat text-slate-600'>Or pick a recent post:</p>
+            <ul className='mt-2 space-y-2'>
+              {publishedPosts
+                .filter((post) => post.publish_result && post.publish_result.id)
+                .map((post) => (
+                  <li key={post.id}>
+                    <button
+                      onClick={() => setPostUrl(post.publish_result.id)}
+                      className='w-full text-left p-3 bg-zinc-100 border border-gray-300 rounded-xl font-montserrat text-sm hover:border-blue-400'>
+                      <span className='line-clamp-1'>{post.content}</span>
+                      <span className='text-xs text-slate-500'>{post.publish_result.id}</span>
+                    </button>
+                  </li>
+                ))}
+            </ul>
+          </div>
+        )}
       </div>
 
       <div className='max-width'>
@@ -1,10 +1,18 @@
 from autogen_agentchat.agents import AssistantAgent
-from config.development import model_client
+from config.development import draft_model_client
 
-content_generation_agent = AssistantAgent(
-    name="LinkedInContentAgent",
-    system_message="""You are linkedin post generator, which crafts posts for the user based on the content. You do not give suggestions, you just generate posts which can be directly copied and posted to LinkedIn. 
+SYSTEM_MESSAGE = """You are linkedin post generator, which crafts posts for the user based on the content. You do not give suggestions, you just generate posts which can be directly copied and posted to LinkedIn. 
     Give around 50 words of content only.
-    """,
-    model_client=model_client,
-)
+    """
+
+
+def build_content_generation_agent():
+    # A new agent per team run: an agent keeps every message it has seen in its model context
+    return AssistantAgent(
+        name="LinkedInContentAgent",
+        system_message=SYSTEM_MESSAGE,
+        model_client=draft_model_client,
+    )
+
+
+content_generation_agent = build_content_generation_agent()
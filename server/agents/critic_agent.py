@@ -1,9 +1,7 @@
 from autogen_agentchat.agents import AssistantAgent
-from config.development import model_client
+from config.development import critique_model_client
 
-critic_agent = AssistantAgent(
-    name="critic",
-    system_message="""
+SYSTEM_MESSAGE = """
     You are a content improvement agent specializing in LinkedIn posts. Your task is to enhance the post content you see by making it more engaging, reader-friendly, and impactful. 
 
     Here is how you improve the post:
@@ -16,6 +14,16 @@ critic_agent = AssistantAgent(
     - Ensure correct **grammar, spelling, and formatting**.
 
     **Output Only the Improved Post:** Do not provide explanations or additional comments—only return the revised post.
-    """,
-    model_client=model_client,
-)
+    """
+
+
+def build_critic_agent():
+    # A new agent per team run: an agent keeps every message it has seen in its model context
+    return AssistantAgent(
+        name="critic",
+        system_message=SYSTEM_MESSAGE,
+        model_client=critique_model_client,
+    )
+
+
+critic_agent = build_critic_agent()
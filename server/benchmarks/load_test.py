@@ -0,0 +1,387 @@
+"""
+Load test for the Flask API in wsgi.py against local mock services.
+
+Starts the stand-ins from benchmarks/mock_services.py, points the app at them
+through the environment variables read by config.development, serves the app
+in-process and drives every route at the requested concurrency. Reports
+p50/p95/p99 latency, throughput, bytes on the wire and memory per route.
+
+Routes that read stored state run against fixtures seeded up front: a post history
+of --history-rows rows (listed from cursors spread over the whole table), a stored
+image (fetched plainly, with If-None-Match and with a Range header) and a campaign
+that has finished generating.
+
+Run from the server directory:
+
+    python -m benchmarks.load_test --requests 200 --concurrency 16
+    python -m benchmarks.load_test --json results.json
+    python -m benchmarks.load_test --baseline results.json --max-regression 0.2
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+from benchmarks.mock_services import Latency, MockServices
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sent as X-User on every request; the seeded history and campaign belong to this user
+LOAD_TEST_USER = "load-test"
+CAMPAIGN_POSTS = 5
+CURSOR_COUNT = 50
+
+# Image fetches rotate through a plain GET, a revalidation and a partial read
+IMAGE_VARIANTS = [
+    (lambda fixtures: {}, 200),
+    (lambda fixtures: {"If-None-Match": f'"{fixtures["image_id"]}"'}, 304),
+    (lambda fixtures: {"Range": "bytes=0-99"}, 206),
+]
+
+# name -> method, path(i, fixtures), JSON body(i, fixtures) or None, extra headers(i, fixtures)
+ROUTES = {
+    "generate-content": (
+        "POST", lambda i, f: "/api/v1/generate-content",
+        lambda i, f: {"query": f"Write a post about leadership #{i}"}, None,
+    ),
+    "generate-image": (
+        "POST", lambda i, f: "/api/v1/generate-image",
+        lambda i, f: {"query": f"A modern office at sunrise #{i}"}, None,
+    ),
+    "post-linkedin": (
+        "POST", lambda i, f: "/api/v1/post-linkedin",
+        lambda i, f: {"generated_content": f"Benchmark post #{i}", "image_path": "generated_image.png"}, None,
+    ),
+    "post-linkedin-accounts": (
+        "POST", lambda i, f: "/api/v1/post-linkedin/accounts",
+        lambda i, f: {
+            "generated_content": f"Benchmark campaign post #{i}",
+            "image_path": "generated_image.png",
+            "accounts": [
+                {"urn": f"urn:li:person:mock{n}", "access_token": f"mock-token-{n}"} for n in range(10)
+            ],
+        },
+        None,
+    ),
+    "list-posts": (
+        # Pages from all over the history: keyset pagination should cost the same at any depth
+        "GET", lambda i, f: f"/api/v1/posts?limit=20&cursor={f['cursors'][i % len(f['cursors'])]}", None, None,
+    ),
+    "get-image": (
+        "GET", lambda i, f: f"/api/v1/images/{f['image_id']}", None,
+        lambda i, f: IMAGE_VARIANTS[i % len(IMAGE_VARIANTS)][0](f),
+    ),
+    "get-campaign": ("GET", lambda i, f: f"/api/v1/campaigns/{f['campaign_id']}", None, None),
+    "publish-campaign-post": (
+        "POST", lambda i, f: f"/api/v1/campaigns/{f['campaign_id']}/posts/{i % CAMPAIGN_POSTS + 1}/publish",
+        None, None,
+    ),
+    # Last: the campaigns it creates keep generating in the background (bulk lane)
+    "create-campaign": (
+        "POST", lambda i, f: "/api/v1/campaigns",
+        lambda i, f: {"topic": f"Remote work #{i}", "count": 2, "images": False}, None,
+    ),
+}
+
+# Routes that need seeded state, and which fixture each one reads
+FIXTURES = {
+    "list-posts": "cursors",
+    "get-image": "image_id",
+    "get-campaign": "campaign_id",
+    "publish-campaign-post": "campaign_id",
+}
+
+
+def generated_post(i, payload, response):
+    """A real post, not an empty body or the query echoed back by a failed agent run"""
+    content = (response.json().get("content") or "").strip()
+    return bool(content) and content != payload["query"].strip()
+
+
+# A 2xx is only a success if the body is what the route promises
+VALIDATORS = {
+    "generate-content": generated_post,
+    "generate-image": lambda i, payload, response: response.headers.get("Content-Type", "").startswith("image/"),
+    "list-posts": lambda i, payload, response: len(response.json()["posts"]) > 0,
+    "get-image": lambda i, payload, response: response.status_code == IMAGE_VARIANTS[i % len(IMAGE_VARIANTS)][1],
+    "create-campaign": lambda i, payload, response: response.status_code == 202,
+    "get-campaign": lambda i, payload, response: len(response.json()["posts"]) == CAMPAIGN_POSTS,
+    "publish-campaign-post": lambda i, payload, response: response.status_code == 202,
+}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, int(round(pct / 100.0 * len(samples) + 0.5)) - 1))
+    return samples[rank]
+
+
+def start_app(port):
+    """Import wsgi.py with the mock environment applied and serve it on a background thread."""
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+    # Per-request access logs would swamp the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    wsgi = importlib.import_module("wsgi")
+    server = make_server("127.0.0.1", port, wsgi.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="app-under-test", daemon=True)
+    thread.start()
+    return server
+
+
+def seed_history(rows):
+    """Insert rows published posts for LOAD_TEST_USER; returns cursors spread over all of them"""
+    from services import post_history
+    from utils import shared_state
+
+    conn = post_history.get_connection()
+    now = time.time()
+    with shared_state.transaction(conn):
+        conn.executemany(
+            "INSERT INTO posts (user, status, content, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (
+                (LOAD_TEST_USER, post_history.PUBLISHED, f"Seeded post #{n}", now - rows + n, now - rows + n)
+                for n in range(rows)
+            ),
+        )
+    # The first page plus pages starting every rows / CURSOR_COUNT rows, down to the oldest
+    cursors = [""]
+    for offset in range(0, max(1, rows - 20), max(1, rows // CURSOR_COUNT)):
+        row = conn.execute(
+            "SELECT created_at, id FROM posts WHERE user = ? ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+            (LOAD_TEST_USER, offset),
+        ).fetchone()
+        cursors.append(post_history.encode_cursor(row))
+    return cursors
+
+
+def seed_campaign(base_url, timeout):
+    """Create a campaign for LOAD_TEST_USER and wait until it is ready; returns its id"""
+    headers = {"X-User": LOAD_TEST_USER}
+    created = requests.post(
+        f"{base_url}/api/v1/campaigns", json={"topic": "Leadership", "count": CAMPAIGN_POSTS, "images": True},
+        headers=headers, timeout=timeout,
+    ).json()
+    deadline = time.time() + timeout
+    campaign = created
+    while campaign["status"] == "generating" and time.time() < deadline:
+        time.sleep(0.2)
+        campaign = requests.get(f"{base_url}/api/v1/campaigns/{created['id']}", headers=headers, timeout=timeout).json()
+    if campaign["status"] != "ready" or len(campaign["posts"]) != CAMPAIGN_POSTS:
+        raise RuntimeError(f"Campaign fixture not ready: {campaign['status']} {campaign.get('error')}")
+    return campaign["id"]
+
+
+def prepare_fixtures(base_url, routes, mocks, history_rows, timeout):
+    """Seed only the state the selected routes read"""
+    from services import assets
+
+    needed = {FIXTURES[name] for name in routes if name in FIXTURES}
+    fixtures = {}
+    if "cursors" in needed:
+        started = time.perf_counter()
+        fixtures["cursors"] = seed_history(history_rows)
+        print(f"Seeded {history_rows} history rows in {time.perf_counter() - started:.1f}s")
+    if "image_id" in needed:
+        fixtures["image_id"] = assets.save_png(mocks.png)[0]
+    if "campaign_id" in needed:
+        fixtures["campaign_id"] = seed_campaign(base_url, timeout)
+    return fixtures
+
+
+def run_route(base_url, name, total, concurrency, timeout, priority="interactive", fixtures=None):
+    method, make_path, make_payload, make_headers = ROUTES[name]
+    validate = VALIDATORS.get(name)
+    fixtures = fixtures or {}
+    # Fresh idempotency keys per run so publishes aren't answered from an earlier run
+    run_id = uuid.uuid4().hex[:8]
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        payload = make_payload(i, fixtures) if make_payload else None
+        headers = {"X-Priority": priority, "X-User": LOAD_TEST_USER, "Idempotency-Key": f"{run_id}-{i}"}
+        if make_headers:
+            headers.update(make_headers(i, fixtures))
+        started = time.perf_counter()
+        try:
+            response = session.request(
+                method, f"{base_url}{make_path(i, fixtures)}", json=payload, headers=headers, timeout=timeout
+            )
+            status = response.status_code
+            body = response.content
+        except requests.RequestException:
+            return time.perf_counter() - started, None, False, 0
+        elapsed = time.perf_counter() - started
+        # Bytes on the wire: compressed bodies are smaller than what requests decodes to
+        wire_bytes = int(response.headers.get("Content-Length", len(body)))
+        try:
+            valid = status < 400 and (validate is None or validate(i, payload, response))
+        except ValueError:
+            valid = False
+        return elapsed, status, valid, wire_bytes
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _, _, _ in results)
+    errors = sum(1 for _, _, valid, _ in results if not valid)
+    # Counted as errors too, and reported separately: 503s from admission control, and
+    # 2xx responses whose body failed validation
+    rejected = sum(1 for _, status, _, _ in results if status == 503)
+    invalid = sum(1 for _, status, valid, _ in results if status is not None and status < 400 and not valid)
+    return {
+        "route": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rejected": rejected,
+        "invalid": invalid,
+        "not_modified": sum(1 for _, status, _, _ in results if status == 304),
+        "bytes_per_request": sum(wire_bytes for _, _, _, wire_bytes in results) / total if total else 0.0,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def max_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def print_report(report):
+    print(
+        f"\n{'route':<24}{'reqs':>6}{'conc':>6}{'err':>5}{'304':>5}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'KB/req':>9}{'peak MB':>10}"
+    )
+    for row in report["routes"]:
+        print(
+            f"{row['route']:<24}{row['requests']:>6}{row['concurrency']:>6}{row['errors']:>5}"
+            f"{row['not_modified']:>5}{row['throughput_rps']:>9.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+            f"{row['p99_ms']:>10.1f}{row['bytes_per_request'] / 1024:>9.1f}{row['traced_peak_mb']:>10.1f}"
+        )
+    print(f"\nProcess max RSS: {report['max_rss_mb']:.1f} MB")
+
+
+def compare_to_baseline(report, baseline_path, max_regression):
+    """Print routes whose p95 or throughput got worse than the baseline by more than max_regression."""
+    with open(baseline_path) as f:
+        baseline = {row["route"]: row for row in json.load(f)["routes"]}
+
+    regressions = []
+    for row in report["routes"]:
+        old = baseline.get(row["route"])
+        if not old:
+            continue
+        if old["p95_ms"] and row["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{row['route']}: p95 {old['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+        if row["throughput_rps"] < old["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{row['route']}: throughput {old['throughput_rps']:.1f} -> {row['throughput_rps']:.1f} rps"
+            )
+
+    if regressions:
+        print("\nRegressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+    else:
+        print("\nNo regressions against baseline.")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Flask API against local mock services")
+    parser.add_argument("--routes", nargs="+", choices=sorted(ROUTES), default=list(ROUTES))
+    parser.add_argument("--requests", type=int, default=100, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients per route")
+    parser.add_argument("--port", type=int, default=5055, help="Port for the app under test")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request client timeout (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Mean mock chat completion latency (s)")
+    parser.add_argument("--image-latency", type=float, default=1.0, help="Mean mock image latency (s)")
+    parser.add_argument("--linkedin-latency", type=float, default=0.1, help="Mean mock LinkedIn latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Uniform jitter on every mock latency (s)")
+    parser.add_argument("--priority", choices=["interactive", "bulk"], default="interactive",
+                        help="X-Priority lane the load is sent in")
+    parser.add_argument("--history-rows", type=int, default=200000,
+                        help="Posts seeded into the history before list-posts runs")
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL for the app under test")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON to this path")
+    parser.add_argument("--baseline", help="Previous --json report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    mocks = MockServices(
+        llm_latency=Latency(args.llm_latency, args.jitter),
+        image_latency=Latency(args.image_latency, args.jitter),
+        linkedin_latency=Latency(args.linkedin_latency, args.jitter),
+    ).start()
+    os.environ.update(mocks.environment())
+    os.environ["LOG_LEVEL"] = args.log_level
+
+    # The app reads and writes generated_image.png relative to the working directory;
+    # keep the checked-in copy untouched.
+    invocation_dir = os.getcwd()
+    json_path = os.path.join(invocation_dir, args.json_path) if args.json_path else None
+    baseline_path = os.path.join(invocation_dir, args.baseline) if args.baseline else None
+    workdir = tempfile.mkdtemp(prefix="linkedin-bench-")
+    os.chdir(workdir)
+    with open("generated_image.png", "wb") as f:
+        f.write(mocks.png)
+
+    tracemalloc.start()
+    app_server = start_app(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"Mock services: {mocks.base_url}  App under test: {base_url}  Workdir: {workdir}")
+
+    report = {"routes": [], "config": vars(args)}
+    try:
+        fixtures = prepare_fixtures(base_url, args.routes, mocks, args.history_rows, args.timeout)
+        for name in args.routes:
+            tracemalloc.reset_peak()
+            row = run_route(base_url, name, args.requests, args.concurrency, args.timeout, args.priority, fixtures)
+            row["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            report["routes"].append(row)
+            print(f"  {name}: {row['requests']} requests, {row['errors']} errors ({row['rejected']} rejected, "
+                  f"{row['invalid']} invalid bodies), p95 {row['p95_ms']:.1f} ms")
+    finally:
+        app_server.shutdown()
+        mocks.stop()
+        tracemalloc.stop()
+
+    report["max_rss_mb"] = max_rss_mb()
+    report["mock_calls"] = mocks.calls
+    print_report(report)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline_path and compare_to_baseline(report, baseline_path, args.max_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Local stand-ins for the external APIs used by the server.
+
+- An OpenAI-compatible ``/chat/completions`` endpoint (Groq), with optional streaming
+- A FLUX-like image endpoint (Hugging Face Inference API) returning PNG bytes
+- LinkedIn ``assets?action=registerUpload``, upload and ``ugcPosts`` endpoints
+
+Every endpoint sleeps for a configurable latency (mean + uniform jitter) before
+answering so load tests exercise realistic request overlap without spending
+any real API quota.
+
+Run standalone:  python -m benchmarks.mock_services --port 8800
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+MOCK_POST_TEXT = (
+    "Leadership is not about titles, it's about impact. "
+    "The best leaders listen first, act with intention and lift others as they climb. "
+    "What is one leadership lesson that changed the way you work? #Leadership #Growth"
+)
+
+# Distinct posts for multi-post (campaign) prompts; MOCK_POST_TEXT is always repeated
+# once as a near-duplicate so the server's de-duplication has something to drop.
+MOCK_CAMPAIGN_POSTS = [
+    MOCK_POST_TEXT,
+    "Early in my career I missed a deadline and owned it in front of the whole team. "
+    "That conversation built more trust than any win that year. #Ownership",
+    "Quick tip: block 30 minutes every Friday to write down what worked, what didn't and "
+    "what you will try next week. Small reviews compound. #Productivity",
+    "73% of employees say recognition matters more than a raise. When did you last thank "
+    "someone on your team by name? #Culture",
+    "Question for founders: how do you decide when to hire your first manager? "
+    "I'd love to hear what signals you watched for. #Startups",
+    "Mentoring taught me that the best answers are often better questions. "
+    "Guide people to their own conclusions and they keep them. #Mentorship",
+    "Remote teams don't fail from distance, they fail from silence. Over-communicate "
+    "decisions, context and wins. #RemoteWork",
+    "Burnout is a systems problem, not a personal weakness. Fix workloads before "
+    "prescribing resilience workshops. #Wellbeing",
+]
+
+
+class Latency:
+    """Mean latency in seconds plus uniform jitter, sampled per request."""
+
+    def __init__(self, mean=0.0, jitter=0.0):
+        self.mean = mean
+        self.jitter = jitter
+
+    def sleep(self):
+        delay = self.mean + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def make_png(width=64, height=64):
+    """Build a small valid RGB PNG without needing Pillow."""
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes((x * 4) % 256 for x in range(width) for _ in range(3))
+    raw = row * height
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+class MockServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Access logs would dominate a load test, keep the mocks quiet
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body, content_type="application/json", extra_headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The app under test was stopped with calls in flight (e.g. campaigns still generating)
+            pass
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        self.server.count(path)
+
+        if path.endswith("/chat/completions"):
+            return self._chat_completions(body)
+        if path.startswith("/hf/"):
+            return self._image()
+        if path == "/linkedin/v2/assets":
+            return self._register_upload(body)
+        if path.startswith("/linkedin/upload/"):
+            self.server.linkedin_latency.sleep()
+            return self._send(201, b"", content_type="text/plain")
+        if path == "/linkedin/v2/ugcPosts":
+            return self._ugc_post(body)
+        return self._send(404, {"error": f"Unknown mock endpoint {path}"})
+
+    def _chat_completions(self, body):
+        payload = json.loads(body or b"{}")
+        model = payload.get("model", "mock-model")
+        latency = self.server.llm_latency
+
+        if not payload.get("stream"):
+            latency.sleep()
+            prompt = payload.get("messages", [{}])[-1].get("content") or ""
+            match = re.search(r"Number of posts: (\d+)", prompt)
+            text = self._campaign_posts(int(match.group(1))) if match else MOCK_POST_TEXT
+            return self._send(200, {
+                "id": f"chatcmpl-{next(self.server.ids)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 64, "completion_tokens": 48, "total_tokens": 112},
+            })
+
+        # Streaming: time-to-first-token is the configured latency, the rest is spread over the chunks
+        words = MOCK_POST_TEXT.split(" ")
+        completion_id = f"chatcmpl-{next(self.server.ids)}"
+        latency.sleep()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for index, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if index == 0 else f" {word}"},
+                    "finish_reason": None,
+                }],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.server.stream_chunk_delay)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 64, "completion_tokens": len(words), "total_tokens": 64 + len(words)},
+        }
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _campaign_posts(self, count):
+        # Continues through the bank across calls, so top-up calls get new posts until it wraps
+        posts = [MOCK_CAMPAIGN_POSTS[next(self.server.campaign_posts) % len(MOCK_CAMPAIGN_POSTS)]
+                 for _ in range(count)]
+        posts.append(MOCK_POST_TEXT.replace("lift others", "lift others up"))
+        return "\n---\n".join(posts)
+
+    def _image(self):
+        self.server.image_latency.sleep()
+        return self._send(200, self.server.png, content_type="image/png")
+
+    def _register_upload(self, body):
+        self.server.linkedin_latency.sleep()
+        upload_id = next(self.server.ids)
+        host, port = self.server.server_address[:2]
+        return self._send(200, {
+            "value": {
+                "uploadMechanism": {
+                    "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest": {
+                        "uploadUrl": f"http://{host}:{port}/linkedin/upload/{upload_id}",
+                        "headers": {},
+                    }
+                },
+                "mediaArtifact": f"urn:li:digitalmediaMediaArtifact:(urn:li:digitalmediaAsset:M{upload_id})",
+                "asset": f"urn:li:digitalmediaAsset:M{upload_id}",
+            }
+        })
+
+    def _ugc_post(self, body):
+        self.server.linkedin_latency.sleep()
+        post_id = next(self.server.ids)
+        return self._send(
+            201,
+            {"id": f"urn:li:share:{post_id}"},
+            extra_headers={"X-RestLi-Id": f"urn:li:share:{post_id}"},
+        )
+
+
+class MockServices(ThreadingHTTPServer):
+    """Threaded HTTP server hosting all the stand-ins on one port."""
+
+    daemon_threads = True
+    # Load tests open many short-lived connections at once
+    request_queue_size = 1024
+
+    def __init__(self, host="127.0.0.1", port=0, llm_latency=None, image_latency=None,
+                 linkedin_latency=None, stream_chunk_delay=0.0, image_size=64):
+        super().__init__((host, port), MockServiceHandler)
+        self.llm_latency = llm_latency or Latency()
+        self.image_latency = image_latency or Latency()
+        self.linkedin_latency = linkedin_latency or Latency()
+        self.stream_chunk_delay = stream_chunk_delay
+        self.png = make_png(image_size, image_size)
+        self.ids = itertools.count(1)
+        self.campaign_posts = itertools.count()
+        self.calls = {}
+        self._calls_lock = threading.Lock()
+        self._thread = None
+
+    def count(self, path):
+        with self._calls_lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self):
+        """Environment variables that point config.development at this server."""
+        return {
+            "GROQ_BASE_URL": f"{self.base_url}/openai/v1",
+            "GROQ_API_KEY": "mock-groq-key",
+            "HUGGINGFACE_API_URL": f"{self.base_url}/hf/models/black-forest-labs/FLUX.1-dev",
+            "HUGGINGFACE_API_KEY": "mock-hf-key",
+            "LINKEDIN_API_URL": f"{self.base_url}/linkedin/v2",
+            "ACCESS_TOKEN": "mock-linkedin-token",
+            "PERSON_URN_KEY": "urn:li:person:mock",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-ins for Groq, Hugging Face and LinkedIn")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean chat completion latency (s)")
+    parser.add_argument("--image-latency", type=float, default=2.0, help="Mean image generation latency (s)")
+    parser.add_argument("--linkedin-latency", type=float, default=0.2, help="Mean LinkedIn call latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform jitter applied to every latency (s)")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.01, help="Delay between streamed chunks (s)")
+    args = parser.parse_args()
+
+    server = MockServices(
+        args.host,
+        args.port,
+        llm_latency=Latency(args.llm_latency, args.jitter),
+        image_latency=Latency(args.image_latency, args.jitter),
+        linkedin_latency=Latency(args.linkedin_latency, args.jitter),
+        stream_chunk_delay=args.stream_chunk_delay,
+    )
+    print(f"Mock services listening on {server.base_url}")
+    print("Point the server at them with:")
+    for key, value in server.environment().items():
+        print(f"  export {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
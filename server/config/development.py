@@ -1,8 +1,10 @@
+import json
 import os
 
 import dotenv
 from autogen_core.models import ModelFamily
 from autogen_ext.models.openai import OpenAIChatCompletionClient
+from utils.model_router import RoutingChatCompletionClient
 
 # Load environment variables from .env
 dotenv.load_dotenv('./.env')
@@ -15,9 +17,93 @@ HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
 EMAIL = os.getenv('EMAIL')
 PASSWORD = os.getenv('PASSWORD')
 
-# API URLs
-HUGGINGFACE_API_URL = "https://api-inference.huggingface.co/models/black-forest-labs/FLUX.1-dev"
-LINKEDIN_API_URL = "https://api.linkedin.com/v2"
+# API URLs (overridable so the app can be pointed at local stand-ins, see benchmarks/)
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL', "https://api.groq.com/openai/v1")
+HUGGINGFACE_API_URL = os.getenv(
+    'HUGGINGFACE_API_URL', "https://api-inference.huggingface.co/models/black-forest-labs/FLUX.1-dev"
+)
+LINKEDIN_API_URL = os.getenv('LINKEDIN_API_URL', "https://api.linkedin.com/v2")
+
+# LinkedIn publishing
+LINKEDIN_TIMEOUT = float(os.getenv('LINKEDIN_TIMEOUT', 30))
+PUBLISH_MAX_WORKERS = int(os.getenv('PUBLISH_MAX_WORKERS', 10))
+
+# Publishing outbox (durable queue in front of LinkedIn, see services/outbox.py)
+OUTBOX_DB_PATH = os.getenv('OUTBOX_DB_PATH', 'outbox.sqlite3')
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv('OUTBOX_RETRY_BASE_DELAY', 2))
+OUTBOX_RETRY_MAX_DELAY = float(os.getenv('OUTBOX_RETRY_MAX_DELAY', 300))
+OUTBOX_DEDUPE_WINDOW = float(os.getenv('OUTBOX_DEDUPE_WINDOW', 3600))
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 1))
+
+# Shared local state, safe to use from several worker processes (see utils/shared_state.py)
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', 'server_state.sqlite3')
+ASSETS_DIR = os.getenv('ASSETS_DIR', 'generated_assets')
+# Legacy fixed path, kept up to date for clients that still send image_path
+LATEST_IMAGE_PATH = 'generated_image.png'
+# Stored images never change (their id is their content hash), so clients may cache them for good
+IMAGE_CACHE_MAX_AGE = int(os.getenv('IMAGE_CACHE_MAX_AGE', 31536000))
+
+# Response compression (see utils/compression.py); brotli needs the optional Brotli package
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 500))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+
+# History of generated and published posts (see services/post_history.py)
+HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', 'post_history.sqlite3')
+
+# Campaign pre-generation (see services/campaigns.py)
+CAMPAIGN_MAX_POSTS = int(os.getenv('CAMPAIGN_MAX_POSTS', 30))
+CAMPAIGN_MAX_WORKERS = int(os.getenv('CAMPAIGN_MAX_WORKERS', 2))
+CAMPAIGN_IMAGE_CONCURRENCY = int(os.getenv('CAMPAIGN_IMAGE_CONCURRENCY', 2))
+CAMPAIGN_DUPLICATE_THRESHOLD = float(os.getenv('CAMPAIGN_DUPLICATE_THRESHOLD', 0.5))
+CAMPAIGN_MAX_ROUNDS = int(os.getenv('CAMPAIGN_MAX_ROUNDS', 3))
+# Generating campaigns hold a lease they renew after every LLM / image call; once it runs
+# out (the worker died) any worker's recovery sweep, every CAMPAIGN_RECOVERY_INTERVAL
+# seconds, generates the campaign again, at most CAMPAIGN_MAX_ATTEMPTS times in total
+CAMPAIGN_LEASE_SECONDS = float(os.getenv('CAMPAIGN_LEASE_SECONDS', 300))
+CAMPAIGN_MAX_ATTEMPTS = int(os.getenv('CAMPAIGN_MAX_ATTEMPTS', 3))
+CAMPAIGN_RECOVERY_INTERVAL = float(os.getenv('CAMPAIGN_RECOVERY_INTERVAL', 60))
+
+# Near-duplicate cache for generated posts (see services/semantic_cache.py). Off by default:
+# a hit returns an earlier post verbatim instead of a new one (per user, never across users)
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.8))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 5000))
+
+# Logging (see utils/logging_setup.py). LOG_SAMPLE_RATES maps a log event name to the
+# fraction of its records that are kept, for high-volume messages on the request path.
+# The sampled events are logged at INFO, so sampling applies at the default LOG_LEVEL.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLE_RATES = json.loads(os.getenv('LOG_SAMPLE_RATES') or 'null') or {
+    "content.response": 0.01,
+    "linkedin.payload": 0.01,
+    "image.error_body": 0.1,
+}
+
+# Admission control for the generation routes (see utils/admission.py), per worker process.
+# concurrency: requests running at once; queue / bulk_queue: how many interactive / bulk
+# requests may wait for a slot before new ones get 503 + Retry-After.
+ADMISSION_LIMITS = json.loads(os.getenv('ADMISSION_LIMITS') or 'null') or {
+    "generate-content": {"concurrency": 8, "queue": 32, "bulk_queue": 8},
+    "generate-image": {"concurrency": 4, "queue": 16, "bulk_queue": 4},
+}
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 20))
+
+# Shared secret for the /api/v1/admin/* routes and X-Profile (see utils/admin_auth.py);
+# both are refused while it is unset
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Request profiling (see utils/profiling.py): a PROFILE_SAMPLE_RATE fraction of all requests,
+# plus, with PROFILE_HEADER_ENABLED, requests sending "X-Profile: 1" together with the admin
+# token, are sampled every PROFILE_INTERVAL seconds
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_HEADER_ENABLED = os.getenv('PROFILE_HEADER_ENABLED', 'false').lower() == 'true'
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))
+PROFILES_DIR = os.getenv('PROFILES_DIR', 'profiles')
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))
 
 # Headers for API requests
 headers = {
@@ -28,21 +114,61 @@ headers2 = {
     "Authorization": f"Bearer {ACCESS_TOKEN}",
 }
 
-def get_headers(content_type=None):
+def get_headers(content_type=None, access_token=None):
     updated_headers = headers2.copy()
+    if access_token:
+        updated_headers["Authorization"] = f"Bearer {access_token}"
     if content_type:
         updated_headers["Content-Type"] = content_type
     return updated_headers
 
 # LLM Configuration
-model_client = OpenAIChatCompletionClient(
-    model="llama3-70b-8192", 
-    base_url="https://api.groq.com/openai/v1",
-    api_key=GROQ_API_KEY,
-    model_info={
-        "vision": False,
-        "function_calling": False,
-        "json_output": False,
-        "family": ModelFamily.is_openai,  
-    },
-)
+# Each backend is an OpenAI-compatible endpoint serving one role: "draft" (content agent,
+# small and fast) or "critique" (critic and the other agents, larger). Override with a JSON
+# list in LLM_BACKENDS, e.g.
+#   [{"name": "groq-8b", "role": "draft", "model": "llama3-8b-8192",
+#     "base_url": "https://api.groq.com/openai/v1", "api_key_env": "GROQ_API_KEY"}, ...]
+# Failover and hedged requests need two or more backends for a role; the defaults list a
+# second Groq model of the same size per role (listed second, so it is only used for
+# failover and hedging until its measured latency beats the first).
+LLM_BACKENDS = json.loads(os.getenv('LLM_BACKENDS') or 'null') or [
+    {"name": "groq-llama3-8b", "role": "draft", "model": "llama3-8b-8192",
+     "base_url": GROQ_BASE_URL, "api_key_env": "GROQ_API_KEY"},
+    {"name": "groq-llama3.1-8b", "role": "draft", "model": "llama-3.1-8b-instant",
+     "base_url": GROQ_BASE_URL, "api_key_env": "GROQ_API_KEY"},
+    {"name": "groq-llama3-70b", "role": "critique", "model": "llama3-70b-8192",
+     "base_url": GROQ_BASE_URL, "api_key_env": "GROQ_API_KEY"},
+    {"name": "groq-llama3.3-70b", "role": "critique", "model": "llama-3.3-70b-versatile",
+     "base_url": GROQ_BASE_URL, "api_key_env": "GROQ_API_KEY"},
+]
+# Latency samples a backend needs before requests to it get hedged at its p95
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20))
+
+model_info = {
+    "vision": False,
+    "function_calling": False,
+    "json_output": False,
+    "family": ModelFamily.is_openai,
+}
+
+def build_model_client(role):
+    backends = [
+        (
+            backend["name"],
+            OpenAIChatCompletionClient(
+                model=backend["model"],
+                base_url=backend["base_url"],
+                api_key=os.getenv(backend.get("api_key_env", "GROQ_API_KEY")),
+                model_info=model_info,
+            ),
+        )
+        for backend in LLM_BACKENDS
+        if backend["role"] == role
+    ]
+    return RoutingChatCompletionClient(backends, name=role, hedge_min_samples=LLM_HEDGE_MIN_SAMPLES)
+
+draft_model_client = build_model_client("draft")
+critique_model_client = build_model_client("critique")
+
+# Default client for agents without a dedicated role
+model_client = critique_model_client
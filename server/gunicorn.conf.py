@@ -0,0 +1,29 @@
+# Multi-process serving: gunicorn -c gunicorn.conf.py
+#
+# The app is imported once in the master (preload) and forked into WORKERS processes,
+# each with THREADS request threads for the I/O-bound LLM / image / LinkedIn calls.
+# Everything shared between workers (semantic cache, counters, outbox jobs, generated
+# images) lives in SQLite / on disk, see utils/shared_state.py.
+import multiprocessing
+import os
+
+# Tells wsgi.py not to start background threads in the master; they don't survive fork()
+os.environ.setdefault("PREFORK_SERVER", "1")
+
+wsgi_app = "wsgi:app"
+bind = f"0.0.0.0:{os.getenv('PORT', '5005')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.getenv("WEB_THREADS", 4))
+worker_class = "gthread"
+preload_app = True
+# Generation requests wait on Groq / Hugging Face for tens of seconds
+timeout = int(os.getenv("WEB_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    from services import campaigns, outbox
+
+    outbox.start_worker()
+    campaigns.start_recovery()
@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+
+from config.development import ADMISSION_LIMITS, ADMISSION_QUEUE_TIMEOUT, STATE_DB_PATH
+from utils.admission import BULK, AdmissionController, Rejected
+
+# This process's admission controllers, one per generation route (see utils/admission.py).
+#
+# The routes in wsgi.py take slots for their requests; background work such as campaign
+# generation takes bulk-lane slots from the same controllers, so it counts against the
+# same upstream limits and always yields to UI requests.
+
+controllers = {
+    route: AdmissionController(route, queue_timeout=ADMISSION_QUEUE_TIMEOUT, counters_path=STATE_DB_PATH, **limits)
+    for route, limits in ADMISSION_LIMITS.items()
+}
+
+
+@contextmanager
+def background_slot(route, heartbeat=None):
+    """Bulk-lane slot for work nobody is waiting on: waits out rejections instead of failing.
+
+    heartbeat() is called after every rejection, so a job holding a lease can keep it (or
+    give up by raising) while it waits.
+    """
+    controller = controllers[route]
+    while True:
+        try:
+            controller.acquire(BULK)
+            break
+        except Rejected as e:
+            if heartbeat is not None:
+                heartbeat()
+            time.sleep(e.retry_after)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        controller.release(time.perf_counter() - started)
@@ -0,0 +1,30 @@
+import hashlib
+import os
+import re
+
+from config.development import ASSETS_DIR, LATEST_IMAGE_PATH
+from utils.shared_state import atomic_write
+
+# Generated images are stored content-addressed under ASSETS_DIR, so concurrent requests
+# (threads or worker processes) never overwrite each other's output. Every file is written
+# atomically; the legacy generated_image.png is refreshed the same way for older clients.
+
+IMAGE_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def save_png(png_bytes):
+    """Store PNG bytes and return (image_id, path)"""
+    image_id = hashlib.sha256(png_bytes).hexdigest()[:32]
+    path = os.path.abspath(os.path.join(ASSETS_DIR, f"{image_id}.png"))
+    if not os.path.exists(path):
+        atomic_write(path, png_bytes)
+    atomic_write(LATEST_IMAGE_PATH, png_bytes)
+    return image_id, path
+
+
+def asset_path(image_id):
+    """Path of a stored image, or None for unknown or malformed ids"""
+    if not image_id or not IMAGE_ID_PATTERN.fullmatch(image_id):
+        return None
+    path = os.path.abspath(os.path.join(ASSETS_DIR, f"{image_id}.png"))
+    return path if os.path.exists(path) else None
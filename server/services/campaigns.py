@@ -0,0 +1,367 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from autogen_core.models import SystemMessage, UserMessage
+from config.development import (
+    CAMPAIGN_DUPLICATE_THRESHOLD,
+    CAMPAIGN_IMAGE_CONCURRENCY,
+    CAMPAIGN_LEASE_SECONDS,
+    CAMPAIGN_MAX_ATTEMPTS,
+    CAMPAIGN_MAX_ROUNDS,
+    CAMPAIGN_MAX_WORKERS,
+    CAMPAIGN_RECOVERY_INTERVAL,
+    HISTORY_DB_PATH,
+    draft_model_client,
+)
+from services import outbox, post_history
+from services.admission import background_slot
+from services.assets import asset_path
+from services.generate_image import generate_image
+from services.semantic_cache import features, jaccard
+from utils import async_runner, shared_state
+from utils.logging_setup import request_id_var
+
+# Campaign mode: a topic turned into N distinct, ready-to-publish posts ahead of time.
+#
+# Drafts come from one multi-post LLM call (topped up with follow-up calls if too few
+# survive), near-duplicates are dropped locally with the same word-set Jaccard similarity
+# the semantic cache uses, and images are generated with bounded parallelism. The LLM and
+# image calls take bulk-lane admission slots, so campaigns never crowd out UI requests.
+# Posts, images and the campaign's READY status are stored in one transaction once
+# everything exists; publishing a campaign post is then just an outbox enqueue, so
+# scheduled publishes never wait on generation.
+#
+# Generation runs on a thread pool in whichever worker process created the campaign, under
+# a lease it renews as it goes. If that process dies, the campaign's lease runs out and the
+# recovery thread of any worker claims it and generates it again, up to
+# CAMPAIGN_MAX_ATTEMPTS times before marking it failed.
+
+GENERATING = "generating"
+READY = "ready"
+FAILED = "failed"
+
+POST_SEPARATOR = "---"
+
+SYSTEM_PROMPT = f"""You are a LinkedIn post generator preparing a multi-day posting campaign.
+Write the requested number of distinct posts about the topic, each around 50 words and each taking a
+different angle (a story, a tip, a question, a statistic, a lesson learned, ...).
+Separate posts with a line containing only {POST_SEPARATOR}. Output only the posts: no numbering, titles or
+commentary."""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    requested INTEGER NOT NULL,
+    with_images INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    claim TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    request_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_campaigns_user ON campaigns (user, created_at);
+CREATE INDEX IF NOT EXISTS ix_campaigns_lease ON campaigns (status, lease_until);
+CREATE TABLE IF NOT EXISTS campaign_posts (
+    campaign_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    PRIMARY KEY (campaign_id, position)
+) WITHOUT ROWID;
+"""
+
+_executor = None
+_executor_lock = threading.Lock()
+_recovery = None
+_recovery_lock = threading.Lock()
+
+
+class LeaseLost(Exception):
+    """Another worker has claimed the campaign (this one was presumed dead)"""
+
+
+class NotReady(Exception):
+    """A campaign post was published before the campaign finished generating"""
+
+
+def get_connection():
+    # Lives next to the post history so campaign posts can be joined to their posts
+    return shared_state.ensure_schema(shared_state.connect(HISTORY_DB_PATH), HISTORY_DB_PATH, SCHEMA)
+
+
+def _submit(campaign_id, claim):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CAMPAIGN_MAX_WORKERS, thread_name_prefix="campaign")
+    _executor.submit(run_campaign, campaign_id, claim)
+
+
+def _renew(campaign_id, claim):
+    """Extend the lease; raises LeaseLost if another worker took the campaign over"""
+    now = time.time()
+    # Called from image threads too: each uses its own connection
+    renewed = get_connection().execute(
+        "UPDATE campaigns SET lease_until = ?, updated_at = ? WHERE id = ? AND claim = ? AND status = ?",
+        (now + CAMPAIGN_LEASE_SECONDS, now, campaign_id, claim, GENERATING),
+    ).rowcount
+    if not renewed:
+        raise LeaseLost(f"Campaign {campaign_id} was claimed by another worker")
+
+
+def parse_posts(text):
+    """Split a multi-post completion into individual posts"""
+    posts = []
+    for part in re.split(r"^\s*-{3,}\s*$", text or "", flags=re.MULTILINE):
+        # Models number posts despite being told not to ("Post 2:", "2.", "**2)**")
+        part = re.sub(r"^\s*(?:\*\*)?(?:post\s*\d+|\d+[.)])(?:\*\*)?\s*[:-]?\s*", "", part.strip(), flags=re.IGNORECASE)
+        if part:
+            posts.append(part)
+    return posts
+
+
+def drop_near_duplicates(candidates, kept, threshold):
+    """Candidates whose word set is not too similar to any kept post (or each other)"""
+    kept_features = [features(post) for post in kept]
+    unique = []
+    for post in candidates:
+        post_features = features(post)
+        if not post_features:
+            continue
+        if any(jaccard(post_features, other) >= threshold for other in kept_features):
+            continue
+        kept_features.append(post_features)
+        unique.append(post)
+    return unique
+
+
+def draft_posts(topic, count, heartbeat=None):
+    """Up to count distinct drafts for topic and the tokens spent on them.
+
+    heartbeat() runs after each call and while waiting for an admission slot.
+    """
+    posts = []
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    for _ in range(CAMPAIGN_MAX_ROUNDS):
+        missing = count - len(posts)
+        if missing <= 0:
+            break
+        prompt = f"Topic: {topic}\nNumber of posts: {missing}"
+        if posts:
+            openings = "\n".join(f"- {post.splitlines()[0][:100]}" for post in posts)
+            prompt += f"\nDo not repeat the angles of these existing posts:\n{openings}"
+
+        # The slot is held on this thread, never on the shared event loop
+        with background_slot("generate-content", heartbeat):
+            result = async_runner.run(draft_model_client.create([
+                SystemMessage(content=SYSTEM_PROMPT),
+                UserMessage(content=prompt, source="user"),
+            ]))
+        if heartbeat is not None:
+            heartbeat()
+        usage["prompt_tokens"] += result.usage.prompt_tokens
+        usage["completion_tokens"] += result.usage.completion_tokens
+
+        candidates = parse_posts(result.content if isinstance(result.content, str) else "")
+        unique = drop_near_duplicates(candidates, posts, CAMPAIGN_DUPLICATE_THRESHOLD)
+        logging.info(
+            f"Campaign draft round: {len(candidates)} drafts, {len(candidates) - len(unique)} near-duplicates dropped",
+            extra={"event": "campaign.drafts"},
+        )
+        posts.extend(unique)
+    return posts[:count], usage
+
+
+def image_prompt(topic, post):
+    first_sentence = re.split(r"(?<=[.!?])\s", post.strip(), maxsplit=1)[0]
+    return f"{topic}. {first_sentence}"[:300]
+
+
+def _generate_image(prompt, heartbeat=None):
+    # generate_image blocks on the Hugging Face call, so each runs on its own thread and loop
+    with background_slot("generate-image", heartbeat):
+        return asyncio.run(generate_image(prompt))
+
+
+def run_campaign(campaign_id, claim):
+    conn = get_connection()
+    campaign = conn.execute("SELECT * FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+    token = request_id_var.set(campaign["request_id"])
+    try:
+        def heartbeat():
+            _renew(campaign_id, claim)
+
+        posts, usage = draft_posts(campaign["topic"], campaign["requested"], heartbeat)
+        if not posts:
+            raise RuntimeError("The model returned no usable posts")
+
+        images = [None] * len(posts)
+        if campaign["with_images"]:
+            prompts = [image_prompt(campaign["topic"], post) for post in posts]
+            with ThreadPoolExecutor(max_workers=CAMPAIGN_IMAGE_CONCURRENCY) as pool:
+                results = pool.map(lambda prompt: _generate_image(prompt, heartbeat), prompts)
+                for index, result in enumerate(results):
+                    heartbeat()
+                    if result.get("success"):
+                        images[index] = result
+                    else:
+                        # The post is still publishable, just without an image
+                        logging.warning(f"Campaign {campaign_id}: image for post {index + 1} failed: {result.get('error')}")
+
+        # Token usage is per call, not per post: spread it evenly over the posts it produced
+        share = {key: value // len(posts) for key, value in usage.items()}
+        # Create the history schema first: its DDL would commit the transaction below early
+        post_history.get_connection()
+        with shared_state.transaction(conn):
+            # Only the current claim holder stores anything, and it stores everything at once
+            heartbeat()
+            for position, (post, image) in enumerate(zip(posts, images), start=1):
+                post_id = post_history.record_generated(campaign["user"], campaign["topic"], post, share,
+                                                        request_id=campaign["request_id"])
+                if image is not None:
+                    post_history.attach_image(post_id, campaign["user"], image["image_id"], image["prompt"])
+                conn.execute(
+                    "INSERT INTO campaign_posts (campaign_id, position, post_id) VALUES (?, ?, ?)",
+                    (campaign_id, position, post_id),
+                )
+            conn.execute(
+                "UPDATE campaigns SET status = ?, claim = NULL, lease_until = NULL, updated_at = ? WHERE id = ?",
+                (READY, time.time(), campaign_id),
+            )
+        logging.info(f"Campaign {campaign_id} ready with {len(posts)}/{campaign['requested']} posts")
+    except LeaseLost as e:
+        logging.warning(str(e))
+    except Exception as e:
+        logging.exception(f"Campaign {campaign_id} failed: {e}")
+        conn.execute(
+            "UPDATE campaigns SET status = ?, error = ?, claim = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND claim = ?",
+            (FAILED, str(e), time.time(), campaign_id, claim),
+        )
+    finally:
+        request_id_var.reset(token)
+
+
+def recover_campaigns():
+    """Claim campaigns whose generating worker died and generate them again (or fail them)"""
+    conn = get_connection()
+    now = time.time()
+    stale = conn.execute(
+        "SELECT id, attempts FROM campaigns WHERE status = ? AND lease_until < ?", (GENERATING, now)
+    ).fetchall()
+    for row in stale:
+        if row["attempts"] >= CAMPAIGN_MAX_ATTEMPTS:
+            failed = conn.execute(
+                "UPDATE campaigns SET status = ?, error = ?, claim = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_until < ?",
+                (FAILED, f"Generation was interrupted {row['attempts']} times", now, row["id"], GENERATING, now),
+            ).rowcount
+            if failed:
+                logging.warning(f"Campaign {row['id']} failed: generation was interrupted {row['attempts']} times")
+            continue
+
+        claim = str(uuid.uuid4())
+        # Atomic claim: of several workers sweeping at once, only one gets each campaign
+        claimed = conn.execute(
+            "UPDATE campaigns SET claim = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_until < ?",
+            (claim, now + CAMPAIGN_LEASE_SECONDS, now, row["id"], GENERATING, now),
+        ).rowcount
+        if claimed:
+            logging.info(f"Campaign {row['id']}: resuming interrupted generation (attempt {row['attempts'] + 1})")
+            _submit(row["id"], claim)
+
+
+def run_recovery():
+    while True:
+        try:
+            recover_campaigns()
+        except Exception as e:
+            logging.exception(f"Campaign recovery failed: {e}")
+        time.sleep(CAMPAIGN_RECOVERY_INTERVAL)
+
+
+def start_recovery():
+    """Start the thread that picks up interrupted campaigns, once per process"""
+    global _recovery
+    with _recovery_lock:
+        if _recovery is None or not _recovery.is_alive():
+            _recovery = threading.Thread(target=run_recovery, name="campaign-recovery", daemon=True)
+            _recovery.start()
+    return _recovery
+
+
+def create_campaign(user, topic, count, with_images=True):
+    """Record a campaign and start generating it in the background"""
+    now = time.time()
+    claim = str(uuid.uuid4())
+    cursor = get_connection().execute(
+        """
+        INSERT INTO campaigns (user, topic, requested, with_images, status, claim, lease_until, attempts,
+                               request_id, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (user, topic, count, int(with_images), GENERATING, claim, now + CAMPAIGN_LEASE_SECONDS, 1,
+         request_id_var.get(), now, now),
+    )
+    _submit(cursor.lastrowid, claim)
+    return get_campaign(cursor.lastrowid)
+
+
+def get_campaign(campaign_id):
+    conn = get_connection()
+    campaign = conn.execute("SELECT * FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+    if campaign is None:
+        return None
+    rows = conn.execute(
+        "SELECT position, post_id FROM campaign_posts WHERE campaign_id = ? ORDER BY position", (campaign_id,)
+    ).fetchall()
+    return {
+        "id": campaign["id"],
+        "user": campaign["user"],
+        "topic": campaign["topic"],
+        "requested": campaign["requested"],
+        "with_images": bool(campaign["with_images"]),
+        "status": campaign["status"],
+        "error": campaign["error"],
+        "created_at": campaign["created_at"],
+        "updated_at": campaign["updated_at"],
+        "posts": [{"position": row["position"], **post_history.get_post(row["post_id"])} for row in rows],
+    }
+
+
+def publish(campaign_id, position, user):
+    """Queue one of user's pre-generated posts for publishing; returns (post, outbox entry) or None.
+
+    Other users' campaigns are treated as unknown. Raises NotReady while the campaign is
+    still generating (or failed).
+    """
+    conn = get_connection()
+    campaign = conn.execute("SELECT user, status FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+    if campaign is None or campaign["user"] != user:
+        return None
+    if campaign["status"] != READY:
+        raise NotReady(f"Campaign {campaign_id} is {campaign['status']}, not {READY}")
+    row = conn.execute(
+        "SELECT post_id FROM campaign_posts WHERE campaign_id = ? AND position = ?", (campaign_id, position)
+    ).fetchone()
+    if row is None:
+        return None
+    post = post_history.get_post(row["post_id"])
+    image_path = asset_path(post["image_id"])
+    if post["image_id"] and image_path is None:
+        raise ValueError(f"Image {post['image_id']} of campaign post {position} is no longer stored")
+    post_id, entry = outbox.enqueue_post(
+        post["id"], post["user"], post["content"], image_path, post["image_id"],
+        idempotency_key=f"campaign-{campaign_id}-{position}", request_id=request_id_var.get(),
+    )
+    return post_history.get_post(post_id), entry
@@ -1,14 +1,24 @@
-from agents.content_generation_agent import content_generation_agent
-from agents.critic_agent import critic_agent
+from agents.content_generation_agent import build_content_generation_agent
+from agents.critic_agent import build_critic_agent
 from autogen_agentchat.conditions import MaxMessageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
 
-max_msg_termination = MaxMessageTermination(max_messages=3)
-
 async def generate_content(user_input: str):
+    # Agents and termination conditions are stateful: concurrent requests sharing them
+    # would see each other's messages and stop each other's runs
     team = RoundRobinGroupChat(
-        [content_generation_agent, critic_agent],
-        termination_condition=max_msg_termination,
+        [build_content_generation_agent(), build_critic_agent()],
+        termination_condition=MaxMessageTermination(max_messages=3),
     )
     result = await team.run(task=user_input)
     return result
+
+
+def token_usage(result):
+    """Prompt/completion tokens summed over every agent message of a team run"""
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    for message in getattr(result, 'messages', None) or []:
+        if getattr(message, 'models_usage', None):
+            usage["prompt_tokens"] += message.models_usage.prompt_tokens
+            usage["completion_tokens"] += message.models_usage.completion_tokens
+    return usage
@@ -7,12 +7,13 @@ from autogen_agentchat.messages import TextMessage
 from autogen_core import CancellationToken
 from config.development import HUGGINGFACE_API_URL, headers
 from PIL import Image, UnidentifiedImageError
+from services.assets import save_png
 
 
 def query(payload):
     response = requests.post(HUGGINGFACE_API_URL, headers=headers, json=payload)
     if response.status_code != 200:
-        raise Exception(f"Request failed: {response.status_code}, {response.text}")
+        raise Exception(f"Request failed: {response.status_code}, {response.text[:500]}")
     return response.content
 
 
@@ -22,20 +23,33 @@ async def generate_image(user_input):
     try:
         # Use the user input directly for now
         content = user_input
-        logging.info(f"Using prompt: {content}")
+        logging.info("Generating image", extra={"event": "image.request", "prompt_chars": len(str(content))})
         
         image_bytes = query({"inputs": str(content)})
 
         try:
+            # Decode and re-encode as PNG (CPU-bound; scales with worker processes)
             image = Image.open(io.BytesIO(image_bytes))
-            image.save("generated_image.png")
-            logging.info("Generated image saved.")
-            return {"success": True, "message": "Image generated successfully"}
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            image_id, path = save_png(buffer.getvalue())
+            logging.info(f"Generated image saved as {image_id}.")
+            return {
+                "success": True,
+                "message": "Image generated successfully",
+                "image_id": image_id,
+                "path": path,
+                "prompt": str(content),
+            }
         except UnidentifiedImageError:
-            logging.exception(
-                "The response is not a valid image. Here's the content of the response:"
+            logging.error(
+                "The response is not a valid image (%d bytes)", len(image_bytes), extra={"event": "image.invalid"}
+            )
+            logging.info(
+                "Invalid image response body: %s",
+                image_bytes[:500].decode("utf-8", errors="replace"),
+                extra={"event": "image.error_body"},
             )
-            logging.info(image_bytes.decode("utf-8"))
             return {"success": False, "error": "Failed to generate valid image"}
             
     except Exception as e:
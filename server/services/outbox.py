@@ -0,0 +1,353 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from config.development import (
+    OUTBOX_DB_PATH,
+    OUTBOX_DEDUPE_WINDOW,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_BASE_DELAY,
+    OUTBOX_RETRY_MAX_DELAY,
+    PUBLISH_MAX_WORKERS,
+)
+from services import post_history
+from services.post_linkedin import PERSON_URN_KEY, create_post, create_session, upload_image
+from utils import shared_state
+from utils.logging_setup import request_id_var
+
+# Durable write-ahead outbox for LinkedIn publishes.
+#
+# A publish request is committed to SQLite (content, author and the image bytes
+# themselves, so later image generations can't change what gets posted) and the caller
+# gets an answer immediately. A background worker claims due entries, runs
+# register-upload/upload/ugcPosts and retries failures with exponential backoff.
+# Client-supplied idempotency keys make retried requests return the original entry,
+# and identical payloads already queued or published within OUTBOX_DEDUPE_WINDOW
+# are not posted twice. Both are per user: one user's key or payload never returns
+# another user's entry.
+#
+# Entries are published as PERSON_URN_KEY with the ACCESS_TOKEN from the environment,
+# read when the entry is processed: access tokens are never written to the outbox.
+#
+# LinkedIn's post URN is recorded as soon as ugcPosts accepts the post, before the entry
+# is marked published. An entry reclaimed after a worker crash is therefore finished
+# without posting again if it has a URN, and failed rather than re-posted if the worker
+# died while the ugcPosts call was in flight (LinkedIn may or may not have the post).
+# The same goes for a ugcPosts call that times out or loses its connection after the
+# request was sent: only definite answers from LinkedIn (error statuses) and failures to
+# connect at all are retried.
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+PUBLISHED = "published"
+FAILED = "failed"
+
+# How long a claimed entry stays locked before another worker may pick it up again
+CLAIM_LEASE_SECONDS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    author TEXT NOT NULL,
+    content TEXT NOT NULL,
+    image BLOB,
+    image_asset TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    posting_since REAL,
+    post_urn TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    request_id TEXT,
+    UNIQUE (user, idempotency_key)
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_due ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS ix_outbox_payload ON outbox (payload_hash, status, updated_at);
+"""
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_connection():
+    """Per-thread connection in autocommit mode; transactions are opened explicitly"""
+    conn = shared_state.connect(OUTBOX_DB_PATH, synchronous="FULL")
+    return shared_state.ensure_schema(conn, OUTBOX_DB_PATH, SCHEMA)
+
+
+def payload_hash(author, content, image_bytes):
+    image_digest = hashlib.sha256(image_bytes).hexdigest() if image_bytes else None
+    payload = json.dumps({"author": author, "content": content, "image": image_digest}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def serialize(row, duplicate=False):
+    """Public view of an outbox entry (never includes the image bytes)"""
+    return {
+        "id": row["id"],
+        "idempotency_key": row["idempotency_key"],
+        "author": row["author"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "has_image": row["image"] is not None or row["image_asset"] is not None,
+        "last_error": row["last_error"],
+        "post_urn": row["post_urn"],
+        "response": json.loads(row["result"]) if row["result"] else None,
+        "next_attempt_at": row["next_attempt_at"] if row["status"] == PENDING else None,
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "duplicate": duplicate,
+        "request_id": row["request_id"],
+    }
+
+
+def enqueue(user, content, image_path=None, idempotency_key=None):
+    """Durably record user's publish request and return its outbox entry without calling LinkedIn.
+
+    Re-submitting one of user's idempotency keys returns the existing entry. A payload
+    identical to one of user's entries that is still queued or was published within
+    OUTBOX_DEDUPE_WINDOW returns that entry too. Raises ValueError if image_path can't be read.
+    """
+    author = PERSON_URN_KEY
+    image_bytes = None
+    if image_path:
+        # Read the image now: the file on disk is overwritten by the next generation
+        try:
+            with open(image_path, "rb") as image_file:
+                image_bytes = image_file.read()
+        except OSError as e:
+            raise ValueError(f"Could not read image {image_path}: {e}") from e
+
+    digest = payload_hash(author, content, image_bytes)
+    now = time.time()
+    conn = get_connection()
+
+    with shared_state.transaction(conn):
+        if idempotency_key:
+            row = conn.execute(
+                "SELECT * FROM outbox WHERE user = ? AND idempotency_key = ?", (user, idempotency_key)
+            ).fetchone()
+            if row:
+                return serialize(row, duplicate=True)
+
+        row = conn.execute(
+            """
+            SELECT * FROM outbox
+            WHERE payload_hash = ? AND user = ?
+              AND (status IN (?, ?) OR (status = ? AND updated_at >= ?))
+            ORDER BY id DESC LIMIT 1
+            """,
+            (digest, user, PENDING, IN_PROGRESS, PUBLISHED, now - OUTBOX_DEDUPE_WINDOW),
+        ).fetchone()
+        if row:
+            logging.info(f"Outbox: payload already {row['status']} as entry {row['id']}, not queueing again")
+            return serialize(row, duplicate=True)
+
+        cursor = conn.execute(
+            """
+            INSERT INTO outbox (user, idempotency_key, payload_hash, author, content, image,
+                                status, next_attempt_at, created_at, updated_at, request_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (user, idempotency_key or str(uuid.uuid4()), digest, author, content, image_bytes,
+             PENDING, now, now, now, request_id_var.get()),
+        )
+        row = conn.execute("SELECT * FROM outbox WHERE id = ?", (cursor.lastrowid,)).fetchone()
+
+    logging.info(f"Outbox: queued entry {row['id']} for {author}")
+    _wakeup.set()
+    return serialize(row)
+
+
+def enqueue_post(post_id, user, content, image_path=None, image_id=None, idempotency_key=None, request_id=None):
+    """Record a history post as queued under an outbox key, then enqueue it; returns (post_id, entry).
+
+    The history row carries the key before the entry exists, so the worker can't finish the
+    entry before there is a row for its result. A payload that duplicates an entry queued
+    under another key is re-linked to that entry and follows its outcome.
+    """
+    key = idempotency_key or str(uuid.uuid4())
+    post_id = post_history.record_queued(post_id, user, content, image_id, key, request_id)
+    try:
+        entry = enqueue(user, content, image_path, idempotency_key=key)
+    except ValueError as e:
+        post_history.record_publish_result(user, key, post_history.FAILED, {"error": str(e)})
+        raise
+
+    if entry["idempotency_key"] != key:
+        post_id = post_history.record_queued(post_id, user, content, image_id, entry["idempotency_key"], request_id)
+        # Read again: the other entry may have finished before the row was linked to it
+        entry = {**get_entry(user, entry["idempotency_key"]), "duplicate": True}
+    if entry["status"] in (PUBLISHED, FAILED):
+        post_history.record_queued(
+            post_id, user, content, image_id, entry["idempotency_key"], request_id, entry["status"]
+        )
+    return post_id, entry
+
+
+def get_entry(user, idempotency_key):
+    """One of user's entries by idempotency key, or None"""
+    row = get_connection().execute(
+        "SELECT * FROM outbox WHERE user = ? AND idempotency_key = ?", (user, idempotency_key)
+    ).fetchone()
+    return serialize(row) if row else None
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(OUTBOX_RETRY_MAX_DELAY, OUTBOX_RETRY_BASE_DELAY * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_due(limit):
+    """Atomically lock up to limit due entries for this worker"""
+    conn = get_connection()
+    now = time.time()
+    with shared_state.transaction(conn):
+        rows = conn.execute(
+            """
+            SELECT id FROM outbox
+            WHERE status IN (?, ?) AND next_attempt_at <= ?
+            ORDER BY next_attempt_at LIMIT ?
+            """,
+            (PENDING, IN_PROGRESS, now, limit),
+        ).fetchall()
+        ids = [row["id"] for row in rows]
+        if ids:
+            placeholders = ",".join("?" * len(ids))
+            conn.execute(
+                f"UPDATE outbox SET status = ?, next_attempt_at = ?, updated_at = ? WHERE id IN ({placeholders})",
+                (IN_PROGRESS, now + CLAIM_LEASE_SECONDS, now, *ids),
+            )
+            claimed = conn.execute(f"SELECT * FROM outbox WHERE id IN ({placeholders})", ids).fetchall()
+        else:
+            claimed = []
+    return claimed
+
+
+class UnknownOutcome(Exception):
+    """LinkedIn may or may not have created the post; retrying could publish it twice"""
+
+
+def may_have_reached_linkedin(error):
+    """False only for errors raised before the request was sent (it never connected)"""
+    if isinstance(error, requests.ConnectTimeout):
+        return False
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return not isinstance(reason, NewConnectionError)
+
+
+def process(row, session):
+    """Run one publish attempt; the uploaded asset is persisted so retries don't re-upload"""
+    conn = get_connection()
+    attempts = row["attempts"] + 1
+    # Log the publish under the id of the request that queued it
+    token = request_id_var.set(row["request_id"])
+    try:
+        if row["post_urn"] is not None:
+            # LinkedIn accepted the post before the previous worker could mark it published
+            logging.warning(f"Outbox: entry {row['id']} was already posted as {row['post_urn']}, not posting again")
+            response_json = json.loads(row["result"])
+        elif row["posting_since"] is not None:
+            raise UnknownOutcome(
+                "The publisher stopped while LinkedIn was creating the post; check the profile before re-queueing"
+            )
+        else:
+            image_asset = row["image_asset"]
+            if row["image"] is not None and not image_asset:
+                image_asset = upload_image(
+                    None, row["author"], session=session, image_bytes=row["image"]
+                )
+                conn.execute(
+                    "UPDATE outbox SET image_asset = ?, updated_at = ? WHERE id = ?",
+                    (image_asset, time.time(), row["id"]),
+                )
+
+            conn.execute("UPDATE outbox SET posting_since = ? WHERE id = ?", (time.time(), row["id"]))
+            try:
+                response_json = create_post(row["content"], row["author"], image_asset, session=session)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                if not may_have_reached_linkedin(e):
+                    raise
+                raise UnknownOutcome(
+                    f"No answer from LinkedIn while creating the post ({e}); check the profile before re-queueing"
+                ) from e
+            # Recorded before anything else so a crash from here on can't lead to a second post
+            conn.execute(
+                "UPDATE outbox SET post_urn = ?, result = ?, updated_at = ? WHERE id = ?",
+                (response_json.get("id", ""), json.dumps(response_json), time.time(), row["id"]),
+            )
+
+        conn.execute(
+            "UPDATE outbox SET status = ?, attempts = ?, last_error = NULL, image = NULL, "
+            "updated_at = ? WHERE id = ?",
+            (PUBLISHED, attempts, time.time(), row["id"]),
+        )
+        logging.info(f"Outbox: published entry {row['id']} after {attempts} attempt(s)")
+        post_history.record_publish_result(
+            row["user"], row["idempotency_key"], post_history.PUBLISHED, response_json
+        )
+    except Exception as e:
+        now = time.time()
+        if attempts >= OUTBOX_MAX_ATTEMPTS or isinstance(e, UnknownOutcome):
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (FAILED, attempts, str(e), now, row["id"]),
+            )
+            logging.error(f"Outbox: entry {row['id']} failed permanently after {attempts} attempts: {e}")
+            post_history.record_publish_result(
+                row["user"], row["idempotency_key"], post_history.FAILED, {"error": str(e)}
+            )
+        else:
+            delay = retry_delay(attempts)
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?, posting_since = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (PENDING, attempts, str(e), now + delay, now, row["id"]),
+            )
+            logging.warning(f"Outbox: entry {row['id']} attempt {attempts} failed, retrying in {delay:.1f}s: {e}")
+    finally:
+        request_id_var.reset(token)
+
+
+def run_worker(stop_event=None, max_workers=PUBLISH_MAX_WORKERS):
+    """Drain due entries until stop_event is set, publishing up to max_workers at a time"""
+    stop_event = stop_event or threading.Event()
+    with create_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while not stop_event.is_set():
+            try:
+                rows = claim_due(max_workers)
+                if rows:
+                    list(pool.map(lambda row: process(row, session), rows))
+                    continue
+            except Exception as e:
+                logging.error(f"Outbox worker error: {e}")
+            _wakeup.wait(OUTBOX_POLL_INTERVAL)
+            _wakeup.clear()
+
+
+def start_worker():
+    """Start the background publisher thread once per process"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, name="outbox-worker", daemon=True)
+            _worker.start()
+    return _worker
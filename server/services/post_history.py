@@ -0,0 +1,201 @@
+import base64
+import json
+import time
+
+from config.development import HISTORY_DB_PATH
+from utils import shared_state
+
+# Persistent history of everything the server generates and publishes.
+#
+# One row per post: the query and generated content (with token usage), the image
+# attached to it and the prompt that produced the image, and the outbox key / LinkedIn
+# response once it is published. Listing is keyset-paginated on (created_at, id) so a
+# page costs the same index range scan whether it is the first or the ten-thousandth.
+
+GENERATED = "generated"
+QUEUED = "queued"
+PUBLISHED = "published"
+PARTIAL = "partial"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    status TEXT NOT NULL,
+    query TEXT,
+    content TEXT NOT NULL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    image_id TEXT,
+    image_prompt TEXT,
+    publish_key TEXT,
+    publish_result TEXT,
+    request_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_posts_created ON posts (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_posts_user ON posts (user, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_posts_status ON posts (status, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_posts_publish_key ON posts (publish_key) WHERE publish_key IS NOT NULL;
+"""
+
+MAX_PAGE_SIZE = 100
+
+
+def get_connection():
+    return shared_state.ensure_schema(shared_state.connect(HISTORY_DB_PATH), HISTORY_DB_PATH, SCHEMA)
+
+
+def serialize(row):
+    return {
+        "id": row["id"],
+        "user": row["user"],
+        "status": row["status"],
+        "query": row["query"],
+        "content": row["content"],
+        "cached": bool(row["cached"]),
+        "token_usage": {"prompt_tokens": row["prompt_tokens"], "completion_tokens": row["completion_tokens"]},
+        "image_id": row["image_id"],
+        "image_prompt": row["image_prompt"],
+        "publish_key": row["publish_key"],
+        "publish_result": json.loads(row["publish_result"]) if row["publish_result"] else None,
+        "request_id": row["request_id"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([row["created_at"], row["id"]]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(created_at), int(post_id)
+    except (ValueError, TypeError, UnicodeEncodeError):
+        raise ValueError("Invalid cursor")
+
+
+def record_generated(user, query, content, token_usage=None, cached=False, request_id=None):
+    """Store a freshly generated post and return its id"""
+    usage = token_usage or {}
+    now = time.time()
+    cursor = get_connection().execute(
+        """
+        INSERT INTO posts (user, status, query, content, cached, prompt_tokens, completion_tokens,
+                           request_id, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (user, GENERATED, query, content, int(cached), usage.get("prompt_tokens", 0),
+         usage.get("completion_tokens", 0), request_id, now, now),
+    )
+    return cursor.lastrowid
+
+
+def attach_image(post_id, user, image_id, image_prompt):
+    """Attach an image to one of user's posts; other users' post ids are ignored"""
+    get_connection().execute(
+        "UPDATE posts SET image_id = ?, image_prompt = ?, updated_at = ? WHERE id = ? AND user = ?",
+        (image_id, image_prompt, time.time(), post_id, user),
+    )
+
+
+def record_queued(post_id, user, content, image_id, publish_key, request_id=None, status=QUEUED):
+    """Mark a post as handed to the outbox; posts the server never generated get a new row.
+
+    Call it before the entry is enqueued (see outbox.enqueue_post) so the worker's result
+    always finds the row. A published or failed post is never moved back to queued, and a
+    post_id that isn't one of user's posts gets a new row instead of being overwritten.
+    """
+    conn = get_connection()
+    now = time.time()
+    if post_id is not None:
+        updated = conn.execute(
+            """
+            UPDATE posts SET status = ?, content = ?, image_id = COALESCE(?, image_id), publish_key = ?,
+                             updated_at = ?
+            WHERE id = ? AND user = ? AND status NOT IN (?, ?)
+            """,
+            (status, content, image_id, publish_key, now, post_id, user, PUBLISHED, FAILED),
+        ).rowcount
+        if updated:
+            return post_id
+    # A retried request for the same outbox entry; a finished post published again gets a new row
+    row = conn.execute("SELECT id FROM posts WHERE publish_key = ? AND user = ?", (publish_key, user)).fetchone()
+    if row:
+        return row["id"]
+    cursor = conn.execute(
+        """
+        INSERT INTO posts (user, status, content, image_id, publish_key, request_id, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (user, status, content, image_id, publish_key, request_id, now, now),
+    )
+    return cursor.lastrowid
+
+
+def record_publish_result(user, publish_key, status, result):
+    """Called by the outbox worker once one of user's entries is published or has failed for good"""
+    get_connection().execute(
+        "UPDATE posts SET status = ?, publish_result = ?, updated_at = ? "
+        "WHERE user = ? AND publish_key = ? AND status != ?",
+        (status, json.dumps(result), time.time(), user, publish_key, PUBLISHED),
+    )
+
+
+def record_published(post_id, user, content, image_id, status, results, request_id=None):
+    """Store a synchronous multi-account publish; other users' post ids get a new row"""
+    conn = get_connection()
+    now = time.time()
+    if post_id is not None:
+        updated = conn.execute(
+            """
+            UPDATE posts SET status = ?, content = ?, image_id = COALESCE(?, image_id), publish_result = ?,
+                             updated_at = ?
+            WHERE id = ? AND user = ?
+            """,
+            (status, content, image_id, json.dumps(results), now, post_id, user),
+        ).rowcount
+        if updated:
+            return post_id
+    cursor = conn.execute(
+        """
+        INSERT INTO posts (user, status, content, image_id, publish_result, request_id, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (user, status, content, image_id, json.dumps(results), request_id, now, now),
+    )
+    return cursor.lastrowid
+
+
+def get_post(post_id):
+    row = get_connection().execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone()
+    return serialize(row) if row else None
+
+
+def list_posts(user=None, status=None, limit=20, cursor=None):
+    """Newest-first page of posts and the cursor for the next page (None on the last page)"""
+    limit = max(1, min(MAX_PAGE_SIZE, limit))
+    clauses, params = [], []
+    if user:
+        clauses.append("user = ?")
+        params.append(user)
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend([created_at, post_id])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = get_connection().execute(
+        f"SELECT * FROM posts {where} ORDER BY created_at DESC, id DESC LIMIT ?", (*params, limit + 1)
+    ).fetchall()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [serialize(row) for row in rows[:limit]], next_cursor
@@ -1,127 +1,192 @@
 import os
 import requests
 import logging
-from config.development import get_headers
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from config.development import LINKEDIN_API_URL, LINKEDIN_TIMEOUT, PUBLISH_MAX_WORKERS, get_headers
 
 # LinkedIn API endpoints
-POST_URL = "https://api.linkedin.com/v2/ugcPosts"
-ASSETS_REGISTER_UPLOAD_URL = "https://api.linkedin.com/v2/assets?action=registerUpload"
+POST_URL = f"{LINKEDIN_API_URL}/ugcPosts"
+ASSETS_REGISTER_UPLOAD_URL = f"{LINKEDIN_API_URL}/assets?action=registerUpload"
 
 # Get PERSON_URN_KEY from environment - use correct format that LinkedIn expects
 PERSON_URN_KEY = os.getenv('PERSON_URN_KEY', 'urn:li:person:zEDX9e-ab3')
 
-def upload_image(image_path):
+def upload_image(image_path, person_urn=None, access_token=None, session=None, image_bytes=None):
     """Upload image to LinkedIn following Microsoft Learn documentation exactly"""
     try:
-        HEADERS = get_headers()
-        
+        owner = person_urn or PERSON_URN_KEY
+        http = session or requests
+        HEADERS = get_headers(access_token=access_token)
+
         # Add the REQUIRED header from Microsoft Learn documentation
         HEADERS["X-Restli-Protocol-Version"] = "2.0.0"
-        
+
         # Follow exact structure from documentation
         data = {
             "registerUploadRequest": {
                 "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
-                "owner": PERSON_URN_KEY,
+                "owner": owner,
                 "serviceRelationships": [{"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}],
             }
         }
-        
-        logging.info(f"Registering image upload with data: {data}")
-        
-        res_data = requests.post(ASSETS_REGISTER_UPLOAD_URL, json=data, headers=HEADERS)
-        
+
+        logging.info("Registering image upload: %s", data, extra={"event": "linkedin.payload"})
+
+        res_data = http.post(ASSETS_REGISTER_UPLOAD_URL, json=data, headers=HEADERS, timeout=LINKEDIN_TIMEOUT)
+
         if res_data.status_code != 200:
-            logging.error(f"Image registration failed: {res_data.status_code} - {res_data.text}")
+            logging.error(f"Image registration failed: {res_data.status_code} - {res_data.text[:500]}")
             raise Exception(f"Image registration failed: {res_data.status_code}")
-            
+
         res_json = res_data.json()
-        logging.info(f"Image registration successful: {res_json}")
-        
+
         if "value" not in res_json:
             logging.error(f"Unexpected response format: {res_json}")
             raise Exception(f"Unexpected response format: {res_json}")
-            
+
         upload_url = res_json["value"]["uploadMechanism"]["com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"]["uploadUrl"]
         image_asset = res_json["value"]["asset"]
-        
-        # Upload the actual image file
-        with open(image_path, "rb") as image_file:
-            upload_response = requests.post(upload_url, data=image_file.read(), headers=HEADERS)
-            
-            if upload_response.status_code not in [200, 201]:
-                logging.error(f"Image file upload failed: {upload_response.status_code} - {upload_response.text}")
-                raise Exception(f"Image file upload failed: {upload_response.status_code}")
-                
-            logging.info(f"Image file upload successful: {upload_response.status_code}")
-            return image_asset
-            
+        logging.info(f"Image registration successful: {image_asset}")
+
+        # Upload the actual image file (callers publishing to many accounts pass the bytes in once)
+        if image_bytes is None:
+            with open(image_path, "rb") as image_file:
+                image_bytes = image_file.read()
+
+        upload_response = http.post(upload_url, data=image_bytes, headers=HEADERS, timeout=LINKEDIN_TIMEOUT)
+
+        if upload_response.status_code not in [200, 201]:
+            logging.error(f"Image file upload failed: {upload_response.status_code} - {upload_response.text[:500]}")
+            raise Exception(f"Image file upload failed: {upload_response.status_code}")
+
+        logging.info(f"Image file upload successful: {upload_response.status_code}")
+        return image_asset
+
     except Exception as e:
         logging.error(f"Error in upload_image: {e}")
         raise e
 
-def post_to_linkedin(content, image_path):
-    """Post content to LinkedIn following Microsoft Learn documentation exactly"""
+def build_post_data(content, author, image_asset=None):
+    """Build the ugcPosts payload following Microsoft Learn documentation exactly"""
+    if image_asset:
+        # Create image post following documentation exactly
+        return {
+            "author": author,  # Required field - Person or Organization URN
+            "lifecycleState": "PUBLISHED",  # Required field
+            "specificContent": {
+                "com.linkedin.ugc.ShareContent": {
+                    "shareCommentary": {"text": content},
+                    "shareMediaCategory": "IMAGE",
+                    "media": [{
+                        "status": "READY",
+                        "description": {"text": content},
+                        "media": image_asset,
+                        "title": {"text": "LinkedIn Post"}
+                    }],
+                }
+            },
+            "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
+        }
+
+    # Create text-only post following documentation exactly
+    return {
+        "author": author,  # Required field - Person or Organization URN
+        "lifecycleState": "PUBLISHED",  # Required field
+        "specificContent": {
+            "com.linkedin.ugc.ShareContent": {
+                "shareCommentary": {"text": content},
+                "shareMediaCategory": "NONE"
+            }
+        },
+        "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
+    }
+
+def post_to_linkedin(content, image_path, person_urn=None, access_token=None, session=None, image_bytes=None):
+    """Post content to LinkedIn following Microsoft Learn documentation exactly
+
+    person_urn/access_token default to PERSON_URN_KEY/ACCESS_TOKEN from the environment.
+    """
     try:
-        HEADERS = get_headers(content_type="application/json")
-        
-        # Add the REQUIRED header from Microsoft Learn documentation
-        HEADERS["X-Restli-Protocol-Version"] = "2.0.0"
-        
-        # Try to upload image first
+        author = person_urn or PERSON_URN_KEY
+
+        # Upload the image first; if that fails the post fails too rather than going out text-only
         image_asset = None
-        try:
-            image_asset = upload_image(image_path)
+        if image_path or image_bytes is not None:
+            image_asset = upload_image(image_path, author, access_token, session=session, image_bytes=image_bytes)
             logging.info(f"Image uploaded successfully: {image_asset}")
-        except Exception as e:
-            logging.warning(f"Image upload failed, will post text only: {e}")
-        
-        # Follow exact structure from Microsoft Learn documentation
-        if image_asset:
-            # Create image post following documentation exactly
-            post_data = {
-                "author": PERSON_URN_KEY,  # Required field - Person URN
-                "lifecycleState": "PUBLISHED",  # Required field
-                "specificContent": {
-                    "com.linkedin.ugc.ShareContent": {
-                        "shareCommentary": {"text": content},
-                        "shareMediaCategory": "IMAGE",
-                        "media": [{
-                            "status": "READY",
-                            "description": {"text": content},
-                            "media": image_asset,
-                            "title": {"text": "LinkedIn Post"}
-                        }],
-                    }
-                },
-                "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
-            }
-        else:
-            # Create text-only post following documentation exactly
-            post_data = {
-                "author": PERSON_URN_KEY,  # Required field - Person URN
-                "lifecycleState": "PUBLISHED",  # Required field
-                "specificContent": {
-                    "com.linkedin.ugc.ShareContent": {
-                        "shareCommentary": {"text": content},
-                        "shareMediaCategory": "NONE"
-                    }
-                },
-                "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
-            }
-        
-        logging.info(f"Attempting LinkedIn post with data: {post_data}")
-        logging.info(f"Headers: {HEADERS}")
-        
-        response = requests.post(POST_URL, json=post_data, headers=HEADERS)
-        
-        if response.status_code in [200, 201]:
-            logging.info(f"✅ SUCCESS! LinkedIn post successful: {response.status_code}")
-            return {"success": True, "message": "Post created successfully", "response": response.json()}
-        else:
-            logging.error(f"LinkedIn posting failed: {response.status_code} - {response.text}")
-            raise Exception(f"LinkedIn posting failed: {response.status_code} - {response.text}")
-        
+
+        response_json = create_post(content, author, image_asset, access_token, session=session)
+        return {"success": True, "message": "Post created successfully", "response": response_json}
+
     except Exception as e:
         logging.error(f"Error in post_to_linkedin: {e}")
         return {"success": False, "error": str(e)}
+
+def create_post(content, author, image_asset=None, access_token=None, session=None):
+    """Create the ugcPosts entry and return LinkedIn's response body, raising on failure"""
+    http = session or requests
+    HEADERS = get_headers(content_type="application/json", access_token=access_token)
+
+    # Add the REQUIRED header from Microsoft Learn documentation
+    HEADERS["X-Restli-Protocol-Version"] = "2.0.0"
+
+    post_data = build_post_data(content, author, image_asset)
+
+    # Full payloads are large and contain the post text; only a sample is logged, never the headers
+    logging.info("LinkedIn post payload: %s", post_data, extra={"event": "linkedin.payload"})
+
+    response = http.post(POST_URL, json=post_data, headers=HEADERS, timeout=LINKEDIN_TIMEOUT)
+
+    if response.status_code in [200, 201]:
+        logging.info(f"✅ SUCCESS! LinkedIn post successful: {response.status_code}")
+        return response.json()
+
+    logging.error(f"LinkedIn posting failed: {response.status_code} - {response.text[:500]}")
+    raise Exception(f"LinkedIn posting failed: {response.status_code} - {response.text[:500]}")
+
+def create_session(pool_size=PUBLISH_MAX_WORKERS):
+    """Session whose connection pool is large enough for pool_size concurrent publishes"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def publish_to_accounts(content, image_path, accounts, max_workers=PUBLISH_MAX_WORKERS):
+    """Publish the same post to several member/organization accounts concurrently.
+
+    accounts is a list of {"urn": ..., "access_token": ...}. The register-upload/upload/ugcPosts
+    sequence runs per account on a bounded thread pool sharing one pooled session, and the
+    per-account results are returned in the same order as accounts. Raises ValueError if
+    image_path can't be read; an account whose image upload fails is reported as failed.
+    """
+    image_bytes = None
+    if image_path:
+        try:
+            with open(image_path, "rb") as image_file:
+                image_bytes = image_file.read()
+        except OSError as e:
+            raise ValueError(f"Could not read image {image_path}: {e}") from e
+
+    def publish(account):
+        result = post_to_linkedin(
+            content,
+            image_path,
+            person_urn=account["urn"],
+            access_token=account["access_token"],
+            session=session,
+            image_bytes=image_bytes,
+        )
+        return {"account": account["urn"], **result}
+
+    workers = max(1, min(max_workers, len(accounts)))
+    # Each publish runs in a copy of the caller's context so its logs keep the request id
+    contexts = [contextvars.copy_context() for _ in accounts]
+    with create_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda account, context: context.run(publish, account), accounts, contexts))
+
+    succeeded = sum(1 for result in results if result["success"])
+    logging.info(f"Published to {succeeded}/{len(accounts)} LinkedIn accounts")
+    return results
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import re
+import time
+
+from config.development import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_THRESHOLD,
+    STATE_DB_PATH,
+)
+from utils import shared_state
+
+# Near-duplicate cache for generated posts, computed locally with no network calls.
+#
+# Queries are reduced to a set of content words (stopwords and request boilerplate such as
+# "write", "linkedin", "post" removed, light suffix stemming), so "write a post about
+# leadership" and "LinkedIn post on leadership" both become {"leader"}. A MinHash signature
+# is banded into an LSH index to find candidates quickly; candidates are then scored by exact
+# Jaccard similarity of their word sets and reused when the best score reaches the threshold.
+# Entries, LSH buckets and hit counters live in the shared SQLite state database so every
+# worker process sees the same cache.
+#
+# Entries belong to the user whose request generated them and are only reused for that
+# user's requests. Storing a post for a word set the user already has replaces the old
+# entry, so a regenerated post is what later paraphrases get.
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "on", "in", "at", "to", "for", "from", "by", "with",
+    "about", "regarding", "around", "into", "over", "is", "are", "be", "it", "its", "this", "that",
+    "my", "our", "your", "me", "us", "we", "i", "you", "some", "any", "please", "can", "could",
+    "would", "should", "will", "do", "does", "how", "what", "why", "as", "so", "very", "just",
+    # Request boilerplate that says nothing about the topic
+    "write", "writing", "create", "generate", "make", "draft", "give", "craft", "compose",
+    "linkedin", "post", "posts", "article", "content", "short", "professional", "engaging",
+}
+
+SUFFIXES = ("ations", "ation", "ships", "ship", "ings", "ing", "ness", "ment", "ers", "ies", "ed", "er", "es", "s")
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _permutations(count):
+    """Deterministic (a, b) pairs for the MinHash hash family"""
+    params = []
+    for index in range(count):
+        digest = hashlib.blake2b(f"minhash-{index}".encode("utf-8"), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+
+PERMUTATIONS = _permutations(NUM_PERMUTATIONS)
+
+
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def features(text):
+    """Normalized content words of a query"""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    return frozenset(stem(word) for word in words if word not in STOPWORDS)
+
+
+def minhash(tokens):
+    hashes = [int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+              for token in tokens]
+    return tuple(min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in PERMUTATIONS)
+
+
+def band_keys(signature):
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr(rows).encode("utf-8"), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+
+def jaccard(left, right):
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS semantic_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    query TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_semantic_cache_lru ON semantic_cache (last_used_at);
+CREATE INDEX IF NOT EXISTS ix_semantic_cache_user ON semantic_cache (user, tokens);
+CREATE TABLE IF NOT EXISTS semantic_cache_bands (
+    band_key TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (band_key, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_semantic_cache_bands_entry ON semantic_cache_bands (entry_id);
+"""
+
+COUNTER_PREFIX = "semantic_cache."
+
+
+class SemanticCache:
+    """Bounded LRU of query -> generated post with LSH lookup for near-duplicate queries."""
+
+    def __init__(self, path, threshold=0.8, max_entries=5000):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+    def _connection(self):
+        return shared_state.ensure_schema(shared_state.connect(self.path), self.path, SCHEMA)
+
+    def _count(self, name, amount=1):
+        shared_state.increment(self.path, COUNTER_PREFIX + name, amount)
+
+    def lookup(self, user, query):
+        """Return {"content", "query", "similarity"} for user's closest cached query, or None"""
+        self._count("lookups")
+        tokens = features(query)
+        if not tokens:
+            return None
+
+        conn = self._connection()
+        keys = band_keys(minhash(tokens))
+        rows = conn.execute(
+            f"""
+            SELECT id, query, content, tokens FROM semantic_cache
+            WHERE user = ?
+              AND id IN (SELECT entry_id FROM semantic_cache_bands WHERE band_key IN ({",".join("?" * len(keys))}))
+            """,
+            (user or "", *keys),
+        ).fetchall()
+
+        best, best_score = None, 0.0
+        for row in rows:
+            score = jaccard(tokens, frozenset(json.loads(row["tokens"])))
+            if score > best_score:
+                best, best_score = row, score
+
+        if best is None or best_score < self.threshold:
+            return None
+
+        self._count("hits")
+        conn.execute(
+            "UPDATE semantic_cache SET last_used_at = ?, hits = hits + 1 WHERE id = ?", (time.time(), best["id"])
+        )
+        return {"content": best["content"], "query": best["query"], "similarity": round(best_score, 3)}
+
+    def _delete(self, conn, ids):
+        placeholders = ",".join("?" * len(ids))
+        conn.execute(f"DELETE FROM semantic_cache_bands WHERE entry_id IN ({placeholders})", ids)
+        conn.execute(f"DELETE FROM semantic_cache WHERE id IN ({placeholders})", ids)
+
+    def store(self, user, query, content):
+        tokens = features(query)
+        if not tokens or not content:
+            return
+        keys = band_keys(minhash(tokens))
+        encoded_tokens = json.dumps(sorted(tokens))
+        now = time.time()
+
+        conn = self._connection()
+        with shared_state.transaction(conn):
+            replaced = [row["id"] for row in conn.execute(
+                "SELECT id FROM semantic_cache WHERE user = ? AND tokens = ?", (user or "", encoded_tokens)
+            )]
+            if replaced:
+                self._delete(conn, replaced)
+            cursor = conn.execute(
+                """
+                INSERT INTO semantic_cache (user, query, content, tokens, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (user or "", query, content, encoded_tokens, now, now),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO semantic_cache_bands (band_key, entry_id) VALUES (?, ?)",
+                [(key, cursor.lastrowid) for key in keys],
+            )
+
+            overflow = conn.execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                # Least recently used entries go first
+                stale = [row["id"] for row in conn.execute(
+                    "SELECT id FROM semantic_cache ORDER BY last_used_at LIMIT ?", (overflow,)
+                )]
+                self._delete(conn, stale)
+        if overflow > 0:
+            self._count("evictions", overflow)
+
+    def clear(self):
+        conn = self._connection()
+        with shared_state.transaction(conn):
+            conn.execute("DELETE FROM semantic_cache_bands")
+            conn.execute("DELETE FROM semantic_cache")
+
+    def stats(self):
+        entries = self._connection().execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0]
+        counters = shared_state.get_counters(self.path, COUNTER_PREFIX)
+        lookups = counters.get("lookups", 0)
+        hits = counters.get("hits", 0)
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "lookups": lookups,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": counters.get("evictions", 0),
+        }
+
+
+semantic_cache = (
+    SemanticCache(STATE_DB_PATH, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES) if SEMANTIC_CACHE_ENABLED else None
+)
@@ -0,0 +1,39 @@
+import hmac
+from functools import wraps
+
+# Shared-secret check for operator-only features: the /api/v1/admin/* routes and on-demand
+# request profiling. Clients send the token as "X-Admin-Token: <token>" or
+# "Authorization: Bearer <token>". With no token configured nothing is authorized, so a
+# deployment that never set ADMIN_TOKEN exposes neither.
+
+
+def sent_token(request):
+    token = request.headers.get("X-Admin-Token")
+    if token:
+        return token
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return credentials.strip() if scheme.lower() == "bearer" else ""
+
+
+def is_admin(request, admin_token):
+    """True if the request carries admin_token (never when admin_token is unset)"""
+    if not admin_token:
+        return False
+    return hmac.compare_digest(sent_token(request).encode("utf-8"), admin_token.encode("utf-8"))
+
+
+def admin_required(admin_token):
+    """Route decorator: 403 while no admin token is configured, 401 without the right one"""
+    from flask import jsonify, request
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not admin_token:
+                return jsonify({"error": "Admin routes are disabled; set ADMIN_TOKEN to enable them"}), 403
+            if not is_admin(request, admin_token):
+                return jsonify({"error": "Admin token required"}), 401
+            return view(*args, **kwargs)
+        return wrapper
+
+    return decorator
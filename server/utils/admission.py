@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from utils import shared_state
+
+# Admission control for slow upstream-bound routes.
+#
+# Each route gets a fixed number of concurrent slots. Requests beyond that wait in a
+# bounded queue; when a slot frees up, waiting interactive requests (the UI) are always
+# served before bulk ones (scheduled posts, analysis scripts, benchmarks). A request that
+# finds its lane's queue full, or that would not get a slot within the queue timeout, is
+# rejected straight away so the caller can back off instead of tying up a worker.
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+# Lower value is served first
+LANE_PRIORITY = {INTERACTIVE: 0, BULK: 1}
+
+COUNTER_PREFIX = "admission."
+
+
+def lane_for(priority_header):
+    """Lane for an X-Priority header value; anything but "bulk" is interactive"""
+    return BULK if (priority_header or "").strip().lower() == BULK else INTERACTIVE
+
+
+class Rejected(Exception):
+    def __init__(self, route, lane, reason, retry_after):
+        super().__init__(f"{route} is overloaded ({reason}), retry in {retry_after}s")
+        self.route = route
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limit with bounded, prioritised wait queues for one route."""
+
+    def __init__(self, route, concurrency, queue, bulk_queue=None, queue_timeout=20, counters_path=None):
+        self.route = route
+        self.concurrency = concurrency
+        self.queue_limits = {INTERACTIVE: queue, BULK: queue if bulk_queue is None else bulk_queue}
+        self.queue_timeout = queue_timeout
+        self.counters_path = counters_path
+        self.active = 0
+        self._queued = {lane: 0 for lane in LANE_PRIORITY}
+        # Heap of [priority, sequence, granted] tickets; FIFO within a lane
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._service_times = deque(maxlen=100)
+
+    def _count(self, lane, name):
+        if self.counters_path:
+            shared_state.increment(self.counters_path, f"{COUNTER_PREFIX}{self.route}.{lane}.{name}")
+
+    def _mean_service_time(self):
+        samples = list(self._service_times)
+        return sum(samples) / len(samples) if samples else None
+
+    def _estimated_wait(self, ahead):
+        """Seconds until a request with `ahead` requests in front of it gets a slot"""
+        mean = self._mean_service_time()
+        if mean is None:
+            return None
+        return (ahead // self.concurrency + 1) * mean
+
+    def _retry_after(self):
+        wait = self._estimated_wait(sum(self._queued.values()))
+        return max(1, min(60, math.ceil(wait if wait is not None else 1)))
+
+    def _dispatch(self):
+        """Hand free slots to the highest-priority waiters (caller holds the lock)"""
+        while self._waiters and self.active < self.concurrency:
+            ticket = heapq.heappop(self._waiters)
+            ticket[2] = True
+            self.active += 1
+        self._cond.notify_all()
+
+    def _wait_for_slot(self, lane):
+        """Block until a slot is granted; returns the rejection reason instead if there is none"""
+        with self._cond:
+            if self.active < self.concurrency and not self._waiters:
+                self.active += 1
+                return None
+
+            if self._queued[lane] >= self.queue_limits[lane]:
+                return "queue_full"
+            ahead = sum(1 for ticket in self._waiters if ticket[0] <= LANE_PRIORITY[lane])
+            estimate = self._estimated_wait(ahead)
+            if len(self._service_times) >= 10 and estimate > self.queue_timeout:
+                # Would time out in the queue anyway: fail fast
+                return "overloaded"
+
+            ticket = [LANE_PRIORITY[lane], next(self._sequence), False]
+            heapq.heappush(self._waiters, ticket)
+            self._queued[lane] += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while not ticket[2]:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(ticket)
+                        heapq.heapify(self._waiters)
+                        return "queue_timeout"
+                    self._cond.wait(remaining)
+            finally:
+                self._queued[lane] -= 1
+            return None
+
+    def acquire(self, lane=INTERACTIVE):
+        """Take a slot, waiting in the lane's queue if needed; raises Rejected when overloaded"""
+        reason = self._wait_for_slot(lane)
+        if reason is not None:
+            self._count(lane, "rejected")
+            self._count(lane, f"rejected.{reason}")
+            with self._cond:
+                retry_after = self._retry_after()
+            raise Rejected(self.route, lane, reason, retry_after)
+        self._count(lane, "admitted")
+
+    def release(self, service_time=None):
+        with self._cond:
+            self.active -= 1
+            if service_time is not None:
+                self._service_times.append(service_time)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, lane=INTERACTIVE):
+        self.acquire(lane)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def stats(self):
+        """Live state of this worker process plus counters shared by all workers"""
+        with self._cond:
+            active = self.active
+            queued = dict(self._queued)
+            mean = self._mean_service_time()
+        counters = {}
+        if self.counters_path:
+            counters = shared_state.get_counters(self.counters_path, f"{COUNTER_PREFIX}{self.route}.")
+        return {
+            "concurrency": self.concurrency,
+            "active": active,
+            "queue_depth": queued,
+            "queue_limits": self.queue_limits,
+            "queue_timeout": self.queue_timeout,
+            "mean_service_ms": round(mean * 1000, 1) if mean is not None else None,
+            "counters": counters,
+        }
@@ -0,0 +1,44 @@
+import asyncio
+import contextvars
+import os
+import threading
+
+from utils import profiling
+
+# One long-lived event loop per process for the agent / model-client coroutines.
+#
+# The model clients in config.development are module-level singletons, and their HTTP
+# connection pools bind to the event loop that first used them. asyncio.run() per request
+# gave every request a fresh loop and closed it afterwards, so the next request reused
+# pooled connections of a closed loop and failed with "Event loop is closed". Request
+# threads now hand their coroutines to this loop and block on the result instead.
+
+_loop = None
+_loop_pid = None
+_lock = threading.Lock()
+
+
+def _get_loop():
+    global _loop, _loop_pid
+    with _lock:
+        # Threads don't survive fork(): each worker process starts its own loop
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            thread = threading.Thread(target=_loop.run_forever, name="async-runner", daemon=True)
+            # Profiled requests wait on this thread; sample their coroutines here too
+            profiling.watch_loop(_loop, thread)
+            thread.start()
+        return _loop
+
+
+async def _in_context(coro, context):
+    # The loop thread has its own context; carry the caller's (request id) over
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+def run(coro):
+    """Run a coroutine on the shared loop from a synchronous thread and return its result"""
+    return asyncio.run_coroutine_threadsafe(_in_context(coro, contextvars.copy_context()), _get_loop()).result()
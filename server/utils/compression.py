@@ -0,0 +1,89 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Response compression and conditional GETs for the API's JSON and SSE responses.
+#
+# The encoding is negotiated from Accept-Encoding (brotli when the optional Brotli package
+# is installed and the client accepts it, otherwise gzip). Buffered bodies are compressed
+# in one go; streamed text/event-stream bodies are compressed chunk by chunk with a flush
+# after each event so the client still sees every event immediately. JSON GETs get a
+# strong ETag over the encoded body and answer a matching If-None-Match with 304.
+# Files from send_file (images, profiles) are left alone: they are passed through as-is
+# and carry their own ETag / Range handling.
+
+COMPRESSIBLE_TYPES = {"application/json", "text/event-stream", "text/plain"}
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding the client accepts, or None for identity"""
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=5):
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime=0 keeps the output, and so the ETag, identical for identical bodies
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_stream(chunks, encoding, gzip_level=6, brotli_quality=5):
+    """Compress an iterable of byte chunks, flushing after each so events aren't held back"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=brotli_quality)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def init_compression(app, min_size=500, gzip_level=6, brotli_quality=5):
+    """Compress JSON/SSE responses and make JSON GETs conditional"""
+    from flask import request
+
+    @app.after_request
+    def _encode_response(response):
+        if (
+            response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or "Content-Encoding" in response.headers
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+        ):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        response.vary.add("Accept-Encoding")
+
+        if response.is_streamed:
+            if encoding:
+                response.response = compress_stream(response.response, encoding, gzip_level, brotli_quality)
+                response.headers["Content-Encoding"] = encoding
+                response.headers.pop("Content-Length", None)
+            return response
+
+        data = response.get_data()
+        if encoding and len(data) >= min_size:
+            response.set_data(compress(data, encoding, gzip_level, brotli_quality))
+            response.headers["Content-Encoding"] = encoding
+
+        if request.method in ("GET", "HEAD") and response.status_code == 200:
+            # Hash of the bytes actually sent, so each encoding gets its own strong ETag
+            response.add_etag()
+            response.headers.setdefault("Cache-Control", "no-cache")
+            response.make_conditional(request)
+        return response
+
+    return _encode_response
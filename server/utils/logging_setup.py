@@ -0,0 +1,197 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+# Request-scoped id; asyncio.run(), tasks and utils.async_runner carry the context, so
+# every stage of a request (agents, model router, image generation) logs the same id.
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+REDACTED = "[REDACTED]"
+SECRET_PATTERNS = [
+    re.compile(r"(Bearer\s+)[A-Za-z0-9._~+/=-]+", re.IGNORECASE),
+    re.compile(r"""(['"]?(?:access_token|api_key|authorization|password|token)['"]?\s*[:=]\s*['"]?)[^'",\s}]+""",
+               re.IGNORECASE),
+    re.compile(r"(gsk_|hf_)[A-Za-z0-9]+"),
+]
+
+# Attributes every LogRecord has; anything else came in through extra=
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+_queue_handler = None
+
+
+def redact(text):
+    for pattern in SECRET_PATTERNS:
+        if pattern.groups:
+            text = pattern.sub(lambda match: match.group(1) + REDACTED, text)
+        else:
+            text = pattern.sub(REDACTED, text)
+    return text
+
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp the current request id on the record (runs in the logging thread's caller)"""
+
+    def filter(self, record):
+        if not getattr(record, "request_id", None):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records for high-volume events.
+
+    Records opt in with extra={"event": name}; rates maps event name to the probability
+    of keeping it. Warnings and errors are never sampled away.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the request path: when the queue is full the record is dropped"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock prepare() runs a whole formatter, tracebacks included, on the caller's
+        # thread. Only the message is merged here (its arguments may change once the caller
+        # moves on); the output formatter does the rest on the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, secrets redacted. Runs on the listener thread."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "msg": redact(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and key not in entry and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return json.dumps(entry, default=str)
+
+
+class RedactingFormatter(logging.Formatter):
+    def format(self, record):
+        return redact(super().format(record))
+
+
+def setup_logging(level="INFO", fmt="json", sample_rates=None, queue_size=10000):
+    """Route all logging through a bounded queue drained by a background thread.
+
+    Callers only pay for filtering, merging the message with its arguments and a
+    put_nowait(); formatting (JSON, tracebacks), redaction and I/O happen on the
+    listener thread.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler()
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(RedactingFormatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(sample_rates or {}))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _queue_handler = handler
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(lambda: _listener.stop())
+    # The listener thread doesn't survive fork(): pre-fork workers get their own
+    os.register_at_fork(after_in_child=_restart_after_fork)
+    return _listener
+
+
+def _restart_after_fork():
+    """Give a forked worker a fresh queue and listener thread (the parent's queue may be mid-use)"""
+    global _listener
+    if _listener is None:
+        return
+    _queue_handler.queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+    _listener = QueueListener(_queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def init_request_logging(app):
+    """Assign every Flask request an id (honouring X-Request-ID) and log its completion"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request():
+        g.request_started = time.perf_counter()
+        g.request_id = request.headers.get("X-Request-ID") or new_request_id()
+        g.request_id_token = request_id_var.set(g.request_id)
+
+    @app.after_request
+    def _finish_request(response):
+        response.headers["X-Request-ID"] = g.get("request_id", "")
+        started = g.get("request_started")
+        if started is not None:
+            logging.getLogger("http").info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    "event": "http.request",
+                    "status": response.status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                },
+            )
+        return response
+
+    @app.teardown_request
+    def _reset_request(exc):
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            request_id_var.reset(token)
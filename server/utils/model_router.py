@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+
+
+class LatencyTracker:
+    """Rolling window of request latencies (seconds) for one backend."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(pct / 100.0 * len(samples)))
+        return samples[index]
+
+
+class Backend:
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+        self.latency = LatencyTracker()
+        self.requests = 0
+        self.errors = 0
+        self.hedges_started = 0
+        self.hedges_won = 0
+        # Requests from every worker thread update the counters
+        self._lock = threading.Lock()
+
+    def count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def counters(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "hedges_started": self.hedges_started,
+                "hedges_won": self.hedges_won,
+            }
+
+
+def is_local_error(error):
+    """Errors raised in this process (e.g. "Event loop is closed") that no other backend can fix"""
+    return isinstance(error, RuntimeError)
+
+
+class RoutingChatCompletionClient(ChatCompletionClient):
+    """Model client that spreads one role (drafting, critique, ...) over several backends.
+
+    Requests go to the backend with the lowest recent median latency. Once a backend has
+    hedge_min_samples latencies recorded, a request still unanswered after that backend's
+    p95 is duplicated on the next-best backend and whichever answers first wins; the other
+    request is cancelled. Errors fail over to the next backend. Streaming requests are
+    routed but not hedged, since a stream can't switch backends mid-way.
+    """
+
+    def __init__(self, backends, name="router", hedge_min_samples=20):
+        if not backends:
+            raise ValueError(f"{name}: at least one model backend is required")
+        self.name = name
+        self.backends = [Backend(backend_name, client) for backend_name, client in backends]
+        self.hedge_min_samples = hedge_min_samples
+
+    def ranked(self):
+        """Backends ordered fastest first; unmeasured backends keep their configured order"""
+        def key(indexed):
+            index, backend = indexed
+            median = backend.latency.percentile(50)
+            return (median is None, median or 0.0, index)
+
+        return [backend for _, backend in sorted(enumerate(self.backends), key=key)]
+
+    def hedge_delay(self, backend):
+        if len(backend.latency) < self.hedge_min_samples:
+            return None
+        return backend.latency.percentile(95)
+
+    async def _timed_create(self, backend, messages, kwargs):
+        started = time.perf_counter()
+        backend.count("requests")
+        try:
+            result = await backend.client.create(messages, **kwargs)
+        except Exception as e:
+            if not is_local_error(e):
+                backend.count("errors")
+            raise
+        # Only completed calls are samples: a cancelled hedge loser's elapsed time is a lower
+        # bound, and recording it would drag the p95 (and so the hedge delay) down
+        backend.latency.record(time.perf_counter() - started)
+        return result
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        kwargs = {
+            "tools": tools,
+            "json_output": json_output,
+            "extra_create_args": extra_create_args,
+            "cancellation_token": cancellation_token,
+        }
+        candidates = self.ranked()
+        tasks = []
+        try:
+            return await self._race(candidates, messages, kwargs, tasks)
+        finally:
+            # Never leave a losing (or abandoned) request running in the background
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _race(self, candidates, messages, kwargs, tasks):
+        last_error = None
+        while candidates:
+            primary = candidates.pop(0)
+            primary_task = asyncio.create_task(self._timed_create(primary, messages, kwargs))
+            tasks.append(primary_task)
+            hedge_after = self.hedge_delay(primary) if candidates else None
+
+            done, _ = await asyncio.wait({primary_task}, timeout=hedge_after)
+            if done:
+                try:
+                    return primary_task.result()
+                except Exception as e:
+                    if is_local_error(e):
+                        logging.error(f"{self.name}: local error calling {primary.name}, not failing over: {e}",
+                                      exc_info=e)
+                        raise
+                    last_error = e
+                    logging.warning(f"{self.name}: backend {primary.name} failed, failing over: {e}")
+                    continue
+
+            # Primary is slower than its own p95: race it against the next-best backend
+            hedge = candidates.pop(0)
+            hedge.count("hedges_started")
+            logging.info(f"{self.name}: {primary.name} exceeded p95 {hedge_after:.2f}s, hedging on {hedge.name}")
+            hedge_task = asyncio.create_task(self._timed_create(hedge, messages, kwargs))
+            tasks.append(hedge_task)
+            pending = {primary_task, hedge_task}
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            hedge.count("hedges_won")
+                        return task.result()
+                    last_error = task.exception()
+                    failed_name = primary.name if task is primary_task else hedge.name
+                    if is_local_error(last_error):
+                        logging.error(f"{self.name}: local error calling {failed_name}: {last_error}",
+                                      exc_info=last_error)
+                        raise last_error
+                    logging.warning(f"{self.name}: backend {failed_name} failed during hedge: {last_error}")
+
+        raise last_error
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        backend = self.ranked()[0]
+        backend.count("requests")
+        started = time.perf_counter()
+        try:
+            async for chunk in backend.client.create_stream(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            ):
+                yield chunk
+        except Exception as e:
+            if not is_local_error(e):
+                backend.count("errors")
+            raise
+        backend.latency.record(time.perf_counter() - started)
+
+    def actual_usage(self) -> RequestUsage:
+        usages = [backend.client.actual_usage() for backend in self.backends]
+        return RequestUsage(
+            prompt_tokens=sum(usage.prompt_tokens for usage in usages),
+            completion_tokens=sum(usage.completion_tokens for usage in usages),
+        )
+
+    def total_usage(self) -> RequestUsage:
+        usages = [backend.client.total_usage() for backend in self.backends]
+        return RequestUsage(
+            prompt_tokens=sum(usage.prompt_tokens for usage in usages),
+            completion_tokens=sum(usage.completion_tokens for usage in usages),
+        )
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.backends[0].client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return min(backend.client.remaining_tokens(messages, tools=tools) for backend in self.backends)
+
+    @property
+    def capabilities(self):
+        return self.backends[0].client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.backends[0].client.model_info
+
+    def stats(self):
+        """Per-backend latency and hedging counters"""
+        return [
+            {
+                "name": backend.name,
+                **backend.counters(),
+                "samples": len(backend.latency),
+                "p50_ms": (backend.latency.percentile(50) or 0.0) * 1000,
+                "p95_ms": (backend.latency.percentile(95) or 0.0) * 1000,
+            }
+            for backend in self.backends
+        ]
@@ -0,0 +1,241 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+
+from utils.admin_auth import is_admin
+from utils.shared_state import atomic_write
+
+# Opt-in sampling profiler for individual requests.
+#
+# A request is profiled when it is picked by the sample rate or, if the header is enabled,
+# sends "X-Profile: 1" with the admin token (profiling on demand costs the server CPU and
+# disk, so anonymous clients can't ask for it).
+# While any profiled request is running, one background thread wakes every `interval`
+# seconds and records the current stack of each profiled request thread, so unprofiled
+# requests pay nothing beyond a header check. Coroutines a profiled request hands to a
+# watched event loop thread (utils/async_runner.py) are sampled too: every task created on
+# that loop remembers the profile of the request that created it (directly or through a
+# parent task), and the loop thread's stack is recorded, under an "[event loop]" root,
+# whenever one of those tasks is the one running. Profiles are saved as collapsed stacks
+# ("frame;frame;frame count" per line), which flamegraph.pl, speedscope and inferno read
+# directly, next to a small JSON file with the request's metadata.
+
+PROFILE_ID_PATTERN = re.compile(r"[0-9a-zA-Z_-]{1,80}")
+
+# The profile of the request running in this context (inherited by tasks it creates)
+current_profile = contextvars.ContextVar("current_profile", default=None)
+# Watched event loops and the threads running them
+_loops = weakref.WeakKeyDictionary()
+# Task -> profile of the request that created it
+_task_profiles = weakref.WeakKeyDictionary()
+
+
+def frame_label(code):
+    filename = code.co_filename
+    # site-packages/autogen_core/_foo.py -> autogen_core/_foo.py
+    parts = filename.replace("\\", "/").split("/")
+    short = "/".join(parts[-2:])
+    return f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ":")
+
+
+class Profile:
+    def __init__(self, thread_id, metadata):
+        self.thread_id = thread_id
+        self.metadata = metadata
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stacks = Counter()
+        self.samples = 0
+
+    def record(self, frame, root=None):
+        stack = []
+        while frame is not None:
+            stack.append(frame_label(frame.f_code))
+            frame = frame.f_back
+        if root:
+            stack.append(root)
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered threads from a single background thread."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, metadata):
+        profile = Profile(threading.get_ident(), metadata)
+        profile.context_token = current_profile.set(profile)
+        with self._lock:
+            self._active[profile.thread_id] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def stop(self, profile):
+        with self._lock:
+            self._active.pop(profile.thread_id, None)
+        try:
+            current_profile.reset(profile.context_token)
+        except ValueError:
+            current_profile.set(None)
+        profile.duration = time.perf_counter() - profile.started
+        return profile
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    # Exit while idle; the next profiled request starts a new thread
+                    self._thread = None
+                    return
+                profiles = list(self._active.values())
+            frames = sys._current_frames()
+            for profile in profiles:
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    profile.record(frame)
+            for loop, thread in list(_loops.items()):
+                # Read from another thread: at worst one sample is credited to the task that just ran
+                task = asyncio.current_task(loop)
+                profile = _task_profiles.get(task) if task is not None else None
+                frame = frames.get(thread.ident)
+                if profile in profiles and frame is not None:
+                    profile.record(frame, root="[event loop]")
+
+
+def _task_factory(loop, coro, context=None):
+    task = asyncio.Task(coro, loop=loop, context=context)
+    profile = context.get(current_profile) if context is not None else current_profile.get()
+    if profile is not None:
+        _task_profiles[task] = profile
+    return task
+
+
+def watch_loop(loop, thread):
+    """Sample profiled requests' coroutines while they run on loop, which thread runs"""
+    loop.set_task_factory(_task_factory)
+    _loops[loop] = thread
+
+
+class ProfileStore:
+    """Collapsed-stack profiles on disk, oldest removed beyond max_profiles"""
+
+    def __init__(self, directory, max_profiles=200):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def _path(self, profile_id, extension):
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, profile_id, profile):
+        metadata = {
+            **profile.metadata,
+            "id": profile_id,
+            "duration_ms": round(profile.duration * 1000, 1),
+            "samples": profile.samples,
+            "created_at": time.time(),
+        }
+        atomic_write(self._path(profile_id, "collapsed"), profile.collapsed().encode("utf-8"))
+        atomic_write(self._path(profile_id, "json"), json.dumps(metadata).encode("utf-8"))
+        self._prune()
+        return metadata
+
+    def _prune(self):
+        profiles = self.list()
+        for metadata in profiles[self.max_profiles:]:
+            for extension in ("collapsed", "json"):
+                try:
+                    os.unlink(self._path(metadata["id"], extension))
+                except OSError:
+                    pass
+
+    def list(self):
+        """Metadata of stored profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                # Being pruned or written by another worker
+                continue
+        return sorted(profiles, key=lambda metadata: metadata.get("created_at", 0), reverse=True)
+
+    def path(self, profile_id):
+        """Collapsed-stack file for a profile id, or None"""
+        if not profile_id or not PROFILE_ID_PATTERN.fullmatch(profile_id):
+            return None
+        path = os.path.abspath(self._path(profile_id, "collapsed"))
+        return path if os.path.exists(path) else None
+
+
+def init_profiling(app, store, sample_rate=0.0, interval=0.005, header_enabled=False, admin_token=None):
+    """Profile a sample_rate fraction of all requests, plus admin requests sending X-Profile: 1"""
+    from flask import g, request
+
+    profiler = SamplingProfiler(interval)
+
+    @app.before_request
+    def _start_profile():
+        requested = (
+            header_enabled
+            and request.headers.get("X-Profile", "").lower() in ("1", "true", "yes")
+            and is_admin(request, admin_token)
+        )
+        if not (requested or (sample_rate and random.random() < sample_rate)):
+            return
+        g.profile = profiler.start({
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "request_id": g.get("request_id"),
+            "sampled": not requested,
+        })
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profiler.stop(profile)
+            profile.metadata["status"] = response.status_code
+            # Not derived from X-Request-ID: ids become file names
+            profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:12]}"
+            try:
+                store.save(profile_id, profile)
+                response.headers["X-Profile-Id"] = profile_id
+            except OSError as e:
+                logging.warning(f"Could not save profile {profile_id}: {e}")
+        return response
+
+    @app.teardown_request
+    def _discard_profile(exc):
+        # after_request doesn't run for unhandled exceptions
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profiler.stop(profile)
+
+    return profiler
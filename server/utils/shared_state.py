@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Process-safe local state shared by every server worker.
+#
+# Under a pre-fork server each worker is its own process, so anything kept in module
+# globals (caches, counters) would silently diverge between workers. State that must be
+# shared lives in SQLite databases in WAL mode (many readers, one writer, safe across
+# processes) and files are replaced atomically so readers never see a partial write.
+
+_local = threading.local()
+# (pid, path, schema) triples already applied by this process
+_schemas_ready = set()
+
+
+def connect(path, synchronous="NORMAL"):
+    """Per-thread, per-process SQLite connection in autocommit mode.
+
+    Connections inherited through fork() are never reused: the cache is keyed on the pid.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        connections[path] = conn
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK on an autocommit connection"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a temp file in the same directory and os.replace()"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def ensure_schema(conn, path, schema):
+    """Run idempotent DDL once per process for the database at path"""
+    key = (os.getpid(), path, schema)
+    if key not in _schemas_ready:
+        conn.executescript(schema)
+        _schemas_ready.add(key)
+    return conn
+
+
+def _counters(path):
+    return ensure_schema(
+        connect(path), path, "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+    )
+
+
+def increment(path, name, amount=1):
+    """Add amount to a named counter shared by all workers"""
+    _counters(path).execute(
+        "INSERT INTO counters (name, value) VALUES (?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, amount),
+    )
+
+
+def get_counters(path, prefix=""):
+    conn = _counters(path)
+    rows = conn.execute("SELECT name, value FROM counters WHERE name LIKE ?", (f"{prefix}%",)).fetchall()
+    return {row["name"][len(prefix):]: row["value"] for row in rows}
@@ -1,17 +1,105 @@
 import asyncio
 import logging
+import os
 
 from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
 
 # from services.feedback import post_summary
-from services.generate_content import generate_content
+from services.generate_content import generate_content, token_usage
 from services.generate_image import generate_image
-from services.post_linkedin import post_to_linkedin
+from services import assets, campaigns, outbox, post_history
+from config.development import (
+    ADMIN_TOKEN,
+    CAMPAIGN_MAX_POSTS,
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    IMAGE_CACHE_MAX_AGE,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    LOG_SAMPLE_RATES,
+    PROFILE_HEADER_ENABLED,
+    PROFILE_INTERVAL,
+    PROFILE_MAX_FILES,
+    PROFILE_SAMPLE_RATE,
+    PROFILES_DIR,
+    critique_model_client,
+    draft_model_client,
+)
+from services.admission import controllers as admission
+from services.post_linkedin import PERSON_URN_KEY, publish_to_accounts
+from services.semantic_cache import semantic_cache
+from utils import async_runner
+from utils.admin_auth import admin_required
+from utils.admission import Rejected, lane_for
+from utils.compression import init_compression
+from utils.logging_setup import init_request_logging, request_id_var, setup_logging
+from utils.profiling import ProfileStore, init_profiling
+
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES, LOG_QUEUE_SIZE)
 
 app = Flask(__name__)
 
-CORS(app)
+CORS(app, expose_headers=["X-Image-Id", "X-Request-ID", "Retry-After", "X-Profile-Id"])
+init_request_logging(app)
+profile_store = ProfileStore(PROFILES_DIR, PROFILE_MAX_FILES)
+# Registered after request logging so profiles carry the request id
+init_profiling(app, profile_store, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL, PROFILE_HEADER_ENABLED, ADMIN_TOKEN)
+init_compression(app, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY)
+
+# Threads don't survive fork(): under the pre-fork server (gunicorn.conf.py) the outbox
+# worker and campaign recovery are started in each worker process by the post_fork hook instead.
+if not os.getenv('PREFORK_SERVER'):
+    outbox.start_worker()
+    campaigns.start_recovery()
+
+# Operator routes under /api/v1/admin/ need ADMIN_TOKEN
+admin_only = admin_required(ADMIN_TOKEN)
+
+
+def resolve_image_path(request_data):
+    """Stored image for image_id, falling back to the legacy image_path field.
+
+    Raises ValueError for an unknown or expired image_id rather than publishing without the image.
+    """
+    image_id = request_data.get('image_id')
+    if image_id:
+        path = assets.asset_path(image_id)
+        if path is None:
+            raise ValueError(f"Unknown image_id {image_id}")
+        return path
+    return request_data.get('image_path')
+
+
+def send_image(image_id, path):
+    """Stored image with a content-hash ETag, immutable caching and Range / If-None-Match support"""
+    response = send_file(path, mimetype='image/png', etag=image_id, max_age=IMAGE_CACHE_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.headers['X-Image-Id'] = image_id
+    return response
+
+
+def current_user():
+    """Whose history a request belongs to: X-User if sent, else the configured LinkedIn member"""
+    return request.headers.get('X-User') or PERSON_URN_KEY
+
+
+def admission_slot(route):
+    # Bounded concurrency per generation route (services/admission.py); send "X-Priority: bulk"
+    # from scheduled jobs and scripts so the UI's requests are served first
+    return admission[route].slot(lane_for(request.headers.get('X-Priority')))
+
+
+def overloaded_response(error):
+    logging.warning(str(error), extra={"event": "admission.rejected", "route": error.route, "lane": error.lane,
+                                       "reason": error.reason})
+    response = jsonify({"error": str(error), "reason": error.reason})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
 
 
 @app.route('/api/v1/generate-content', methods=['POST'])
@@ -19,29 +107,64 @@ def generate_content_route():
     try:
         request_data = request.get_json()
         user_input = request_data.get('query')
-        
-        print(f"Received input: {user_input}")
-        
-        response = asyncio.run(generate_content(user_input))
-        print(f"Response type: {type(response)}")
-        print(f"Response: {response}")
-        
+
+        # Paraphrases of the user's earlier queries reuse their post; "regenerate": true (or
+        # "no_cache": true / "cache": false) forces a fresh one, which then replaces it
+        use_cache = not (request_data.get('regenerate') or request_data.get('no_cache')
+                         or request_data.get('cache', True) is False)
+        if semantic_cache is not None and use_cache:
+            cached = semantic_cache.lookup(current_user(), user_input)
+            if cached:
+                logging.info("Semantic cache hit", extra={"event": "content.cache_hit", "similarity": cached["similarity"]})
+                post_id = post_history.record_generated(
+                    current_user(), user_input, cached["content"], cached=True, request_id=request_id_var.get()
+                )
+                return jsonify({
+                    "content": cached["content"],
+                    "cached": True,
+                    "similarity": cached["similarity"],
+                    "post_id": post_id,
+                })
+
+        logging.info("Generating content", extra={"event": "content.request", "query_chars": len(user_input or "")})
+
+        with admission_slot('generate-content'):
+            response = async_runner.run(generate_content(user_input))
+
+        # A failed model call ends the team run before any agent answers, leaving only the task
+        if not any(getattr(message, 'source', 'user') != 'user' for message in getattr(response, 'messages', None) or []):
+            logging.error("No agent produced a post", extra={"event": "content.failed",
+                                                              "stop_reason": getattr(response, 'stop_reason', None)})
+            return jsonify({"error": "Content generation failed"}), 502
+
         # Check if response has messages attribute
         if hasattr(response, 'messages') and response.messages:
             content = response.messages[len(response.messages) - 1].content
         else:
             # Fallback: try to get content directly
             content = getattr(response, 'content', str(response))
-        
-        print(f"Final content: {content}")
-        
+
+        # The full agent transcript is large; only a sample of requests log it
+        logging.info("Agent response: %r", response, extra={"event": "content.response"})
+        logging.info("Content generated", extra={"event": "content.generated", "content_chars": len(content)})
+
+        if semantic_cache is not None:
+            semantic_cache.store(current_user(), user_input, content)
+
+        usage = token_usage(response)
+        post_id = post_history.record_generated(
+            current_user(), user_input, content, usage, request_id=request_id_var.get()
+        )
+
         return jsonify({
             "content": content,
+            "post_id": post_id,
+            "token_usage": usage,
         })
+    except Rejected as e:
+        return overloaded_response(e)
     except Exception as e:
-        print(f"Error in generate_content_route: {e}")
-        import traceback
-        traceback.print_exc()
+        logging.exception(f"Error in generate_content_route: {e}")
         return jsonify({"error": str(e)}), 500
 
 
@@ -52,35 +175,210 @@ def generate_image_route():
     user_image = request_data.get('query')
 
     try:
-        result = asyncio.run(generate_image(user_image))
+        with admission_slot('generate-image'):
+            result = asyncio.run(generate_image(user_image))
         
         if result and result.get('success'):
-            return send_file('generated_image.png', mimetype='image/png')
+            if request_data.get('post_id'):
+                post_history.attach_image(request_data['post_id'], current_user(), result['image_id'], result['prompt'])
+            return send_image(result['image_id'], result['path'])
         else:
             return jsonify({"error": result.get('error', 'Failed to generate image')}), 500
             
+    except Rejected as e:
+        return overloaded_response(e)
     except Exception as e:
         logging.warning(f"Error occurred due to {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/v1/images/<image_id>', methods=['GET'])
+def get_image_route(image_id):
+    path = assets.asset_path(image_id)
+    if path is None:
+        return jsonify({"error": "Unknown image"}), 404
+    return send_image(image_id, path)
+
+
 @app.route('/api/v1/post-linkedin', methods=['POST'])
 def post_linkedin_route():
     try:
         request_data = request.get_json()
         generated_content = request_data.get('generated_content')
-        image_path = request_data.get('image_path')
+        image_path = resolve_image_path(request_data)
 
-        result = post_to_linkedin(generated_content, image_path)
-        
-        if result.get('success'):
-            return jsonify(result), 200
-        else:
-            return jsonify(result), 400
+        if not generated_content:
+            return jsonify({"success": False, "error": "generated_content is required"}), 400
+
+        # Queued durably and published in the background; poll the status route with the key
+        post_id, entry = outbox.enqueue_post(
+            request_data.get('post_id'),
+            current_user(),
+            generated_content,
+            image_path,
+            request_data.get('image_id'),
+            idempotency_key=request.headers.get('Idempotency-Key') or request_data.get('idempotency_key'),
+            request_id=request_id_var.get(),
+        )
+        return jsonify({"success": True, "message": "Post queued for publishing", "post_id": post_id, **entry}), 202
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route('/api/v1/post-linkedin/<idempotency_key>', methods=['GET'])
+def post_linkedin_status_route(idempotency_key):
+    entry = outbox.get_entry(current_user(), idempotency_key)
+    if entry is None:
+        return jsonify({"success": False, "error": "Unknown idempotency key"}), 404
+    return jsonify({"success": entry["status"] != outbox.FAILED, **entry}), 200
+
+
+@app.route('/api/v1/post-linkedin/accounts', methods=['POST'])
+def post_linkedin_accounts_route():
+    try:
+        request_data = request.get_json()
+        generated_content = request_data.get('generated_content')
+        image_path = resolve_image_path(request_data)
+        accounts = request_data.get('accounts') or []
+
+        if not generated_content:
+            return jsonify({"success": False, "error": "generated_content is required"}), 400
+        if not isinstance(accounts, list) or not accounts or not all(
+            isinstance(account, dict) and account.get('urn') and account.get('access_token') for account in accounts
+        ):
+            return jsonify({"success": False, "error": "accounts must be a list of {urn, access_token}"}), 400
+
+        results = publish_to_accounts(generated_content, image_path, accounts)
+        succeeded = sum(1 for result in results if result.get('success'))
+
+        # 207 when only some of the accounts were published to
+        status = 200 if succeeded == len(results) else 207 if succeeded else 400
+        post_id = post_history.record_published(
+            request_data.get('post_id'), current_user(), generated_content, request_data.get('image_id'),
+            {200: post_history.PUBLISHED, 207: post_history.PARTIAL, 400: post_history.FAILED}[status],
+            results, request_id_var.get(),
+        )
+        return jsonify({
+            "success": succeeded == len(results),
+            "published": succeeded,
+            "results": results,
+            "post_id": post_id,
+        }), status
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route('/api/v1/posts', methods=['GET'])
+def list_posts_route():
+    # The requesting user's posts, newest first; pass next_cursor back as ?cursor= for the following page
+    try:
+        posts, next_cursor = post_history.list_posts(
+            user=current_user(),
+            status=request.args.get('status'),
+            limit=request.args.get('limit', 20, type=int),
+            cursor=request.args.get('cursor'),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"posts": posts, "next_cursor": next_cursor})
+
+
+@app.route('/api/v1/posts/<int:post_id>', methods=['GET'])
+def get_post_route(post_id):
+    post = post_history.get_post(post_id)
+    if post is None or post['user'] != current_user():
+        return jsonify({"error": "Unknown post"}), 404
+    return jsonify(post)
+
+
+@app.route('/api/v1/campaigns', methods=['POST'])
+def create_campaign_route():
+    # Posts (and images) are generated in the background; poll the campaign until it is ready
+    request_data = request.get_json() or {}
+    topic = (request_data.get('topic') or '').strip()
+    count = request_data.get('count')
+
+    if not topic:
+        return jsonify({"success": False, "error": "topic is required"}), 400
+    if not isinstance(count, int) or not 1 <= count <= CAMPAIGN_MAX_POSTS:
+        return jsonify({"success": False, "error": f"count must be between 1 and {CAMPAIGN_MAX_POSTS}"}), 400
+
+    campaign = campaigns.create_campaign(current_user(), topic, count, bool(request_data.get('images', True)))
+    return jsonify({"success": True, **campaign}), 202
+
+
+@app.route('/api/v1/campaigns/<int:campaign_id>', methods=['GET'])
+def get_campaign_route(campaign_id):
+    campaign = campaigns.get_campaign(campaign_id)
+    if campaign is None or campaign['user'] != current_user():
+        return jsonify({"error": "Unknown campaign"}), 404
+    return jsonify(campaign)
+
+
+@app.route('/api/v1/campaigns/<int:campaign_id>/posts/<int:position>/publish', methods=['POST'])
+def publish_campaign_post_route(campaign_id, position):
+    # Nothing is generated here: the pre-generated post and image go straight to the outbox
+    try:
+        published = campaigns.publish(campaign_id, position, current_user())
+        if published is None:
+            return jsonify({"success": False, "error": "Unknown campaign post"}), 404
+        post, entry = published
+        return jsonify({"success": True, "post_id": post["id"], "post": post, **entry}), 202
+    except campaigns.NotReady as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/v1/admin/model-backends', methods=['GET'])
+@admin_only
+def model_backends_route():
+    return jsonify({
+        "draft": draft_model_client.stats(),
+        "critique": critique_model_client.stats(),
+    })
+
+
+@app.route('/api/v1/admin/semantic-cache', methods=['GET'])
+@admin_only
+def semantic_cache_route():
+    if semantic_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **semantic_cache.stats()})
+
+
+@app.route('/api/v1/admin/admission', methods=['GET'])
+@admin_only
+def admission_route():
+    # active / queue_depth are this worker's; counters are totals across workers
+    return jsonify({
+        "worker_pid": os.getpid(),
+        "routes": {route: controller.stats() for route, controller in admission.items()},
+    })
+
+
+@app.route('/api/v1/admin/profiles', methods=['GET'])
+@admin_only
+def profiles_route():
+    return jsonify({"profiles": profile_store.list()})
+
+
+@app.route('/api/v1/admin/profiles/<profile_id>', methods=['GET'])
+@admin_only
+def profile_route(profile_id):
+    # Collapsed stacks: feed to flamegraph.pl, inferno-flamegraph or speedscope.app
+    path = profile_store.path(profile_id)
+    if path is None:
+        return jsonify({"error": "Unknown profile"}), 404
+    return send_file(path, mimetype='text/plain', download_name=f"{profile_id}.collapsed")
+
+
 # @app.route("/api/v1/post-analysis", methods=["GET"])
 # def get_comments_route():
 #     try: